@@ -1,392 +1,610 @@
-import streamlit as st
-import pandas as pd
-from datetime import date
-import os
-
-# Import Modules
-import database as db
-import processing as proc
-import ui
-
-# --- 1. CONFIG & SETUP ---
-st.set_page_config(
-    page_title="Bara Tama Wijaya Water Management",
-    page_icon="🔥",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-ui.load_css()
-
-# --- 2. SESSION STATE & DATA LOADING ---
-if 'data_sump' not in st.session_state or 'data_pompa' not in st.session_state:
-    try:
-        df_s, df_p = db.load_data()
-        st.session_state['data_sump'] = df_s
-        st.session_state['data_pompa'] = df_p
-    except Exception as e:
-        st.error(f"Gagal koneksi ke Neon DB: {e}")
-        st.stop()
-
-if 'logged_in' not in st.session_state: st.session_state['logged_in'] = False
-if 'username' not in st.session_state: st.session_state['username'] = ''
-if 'site_map' not in st.session_state:
-    # Build dynamic site map from DB data
-    if not st.session_state.data_sump.empty:
-        existing_sites = st.session_state.data_sump['Site'].unique()
-        current_map = {}
-        for s in existing_sites:
-            pits = st.session_state.data_sump[st.session_state.data_sump['Site'] == s]['Pit'].unique().tolist()
-            current_map[s] = pits
-        st.session_state['site_map'] = current_map
-    else:
-        st.session_state['site_map'] = {}
-
-# --- 3. SIDEBAR ---
-with st.sidebar:
-    st.markdown("## 🏢 BARA TAMA WIJAYA")
-    if st.session_state['logged_in']:
-        st.success(f"👤 Login: {st.session_state['username']}")
-        if st.button("Logout", use_container_width=True):
-            st.session_state['logged_in'] = False; st.rerun()
-    else:
-        st.info("👀 Mode: View Only")
-    
-    st.divider()
-    
-    # FILTERS
-    current_sites = list(st.session_state['site_map'].keys())
-    selected_site = st.selectbox("📍 Pilih Site", current_sites) if current_sites else None
-    
-    pit_options = ["All Sumps"]
-    if selected_site and selected_site in st.session_state['site_map']: 
-        pit_options += st.session_state['site_map'][selected_site]
-    selected_pit = st.selectbox("💧 Pilih Sump", pit_options)
-
-    # Unit Filter Logic
-    unit_options = ["All Units"]
-    if selected_pit != "All Sumps" and not st.session_state.data_pompa.empty:
-        raw_p = st.session_state.data_pompa
-        avail_units = raw_p[(raw_p['Site'] == selected_site) & (raw_p['Pit'] == selected_pit)]['Unit Code'].unique().tolist()
-        unit_options += sorted(avail_units)
-    selected_unit = st.selectbox("🚜 Pilih Unit Pompa", unit_options)
-    
-    # Date Filter
-    avail_years = sorted(st.session_state.data_sump['Tanggal'].dt.year.unique(), reverse=True) if not st.session_state.data_sump.empty else [date.today().year]
-    sel_year = st.selectbox("📅 Tahun", avail_years)
-    month_map = {1:"Januari", 2:"Februari", 3:"Maret", 4:"April", 5:"Mei", 6:"Juni", 7:"Juli", 8:"Agustus", 9:"September", 10:"Oktober", 11:"November", 12:"Desember"}
-    curr_m = date.today().month
-    sel_month_name = st.selectbox("🗓️ Bulan", list(month_map.values()), index=curr_m-1)
-    sel_month_int = [k for k,v in month_map.items() if v==sel_month_name][0]
-
-# --- 4. DATA PROCESSING ---
-df_wb_dash, df_p_display, title_suffix = proc.process_water_balance(
-    st.session_state.data_sump, st.session_state.data_pompa,
-    selected_site, selected_pit, selected_unit, sel_year, sel_month_int
-)
-
-# --- 5. TABS ---
-st.markdown(f"## 🏢 Bara Tama Wijaya: {selected_site}")
-tab_dash, tab_input, tab_db, tab_admin = st.tabs(["📊 Dashboard", "📝 Input (Admin)", "📂 Database", "⚙️ Setting"])
-
-# TAB 1: DASHBOARD
-with tab_dash:
-    if df_wb_dash.empty:
-        st.warning("⚠️ Data belum tersedia untuk filter ini. Silakan generate dummy data di tab Setting atau input manual.")
-    else:
-        last = df_wb_dash.iloc[-1]
-        
-        # --- HEADER ---
-        st.markdown(f"<div class='date-header'>📅 Dashboard Status per Tanggal: {last['Tanggal'].strftime('%d %B %Y')}</div>", unsafe_allow_html=True)
-        
-        # --- METRICS ---
-        c1, c2, c3, c4, c5 = st.columns(5)
-        c1.metric("Elevasi Air", f"{last['Elevasi Air (m)']} m", f"Crit: {last['Critical Elevation (m)']}")
-        c2.metric("Vol Survey", f"{last['Volume Air Survey (m3)']:,.0f} m³")
-        
-        # Rain metrics
-        rain_today = last['Curah Hujan (mm)']
-        rain_mtd = df_wb_dash['Curah Hujan (mm)'].sum()
-        c3.metric("Rain Today", f"{rain_today} mm")
-        c4.metric("Rain MTD", f"{rain_mtd} mm")
-        
-        # Status Box
-        status_txt = "AMAN"; clr = "#27ae60"
-        if last['Status'] == "BAHAYA": clr = "#e74c3c"; status_txt = "BAHAYA"
-        c5.markdown(f"<div style='background-color:{clr};color:white;padding:20px;border-radius:5px;text-align:center;font-weight:bold;'>{status_txt}</div>", unsafe_allow_html=True)
-        
-        st.markdown("---")
-
-        # --- RESTORED: WATER BALANCE WARNING BANNER ---
-        last_error = last['Error %']
-        is_wb_critical = False
-        
-        # Logic: If error > 5% or is NaN (Not a Number), show warning
-        if last_error > 5.0 or pd.isna(last_error):
-            is_wb_critical = True
-            st.markdown(f"""
-            <div class="wb-alert" style='background-color: #ffcccc; color: #cc0000; padding: 10px; border-radius: 5px; font-weight: bold; margin-bottom: 10px; border: 1px solid #ff0000;'>
-                ⚠️ PERINGATAN WATER BALANCE: Error {last_error:.1f}% (Melebihi Toleransi 5%)<br>
-                Selisih Volume: {last['Diff Volume']:,.0f} m³
-            </div>
-            """, unsafe_allow_html=True)
-            
-        # --- CHARTS (From ui.py) ---
-        ui.render_charts(df_wb_dash, df_p_display, title_suffix)
-
-        # --- RESTORED: DETAIL TABLE ---
-        with st.expander("📋 Lihat Detail Angka Water Balance"):
-            df_show = df_wb_dash[['Tanggal', 'Volume Air Survey (m3)', 'Volume Teoritis', 'Diff Volume', 'Error %']].copy()
-            df_show['Tanggal'] = df_show['Tanggal'].dt.strftime('%d-%m-%Y')
-            
-            # Formatting for nicer display
-            st.dataframe(
-                df_show.style.format({
-                    'Volume Air Survey (m3)': '{:,.0f}',
-                    'Volume Teoritis': '{:,.0f}', 
-                    'Diff Volume': '{:,.0f}',
-                    'Error %': '{:.1f}%'
-                }), 
-                hide_index=True, 
-                use_container_width=True
-            )
-
-        # --- RESTORED: ANALYSIS & RECOMMENDATION BOXES ---
-        st.markdown("---")
-        st.subheader("🧠 Analisa & Rekomendasi")
-        
-        col_an, col_rec = st.columns(2)
-        
-        # Determine Status for Boxes
-        if is_wb_critical:
-            style_box = "danger-box" # CSS class defined in ui.py
-            header_text = "🚨 PERINGATAN: DATA TIDAK BALANCE"
-            bg_color = "#fdedec"
-            border_color = "#e74c3c"
-        elif last['Elevasi Air (m)'] >= last['Critical Elevation (m)']:
-            style_box = "danger-box"
-            header_text = "🚨 BAHAYA: ELEVASI TINGGI"
-            bg_color = "#fdedec"
-            border_color = "#e74c3c"
-        else:
-            style_box = "analysis-box"
-            header_text = "✅ KONDISI AMAN"
-            bg_color = "#e8f6f3"
-            border_color = "#1abc9c"
-
-        # Render Left Box (Analysis)
-        with col_an:
-            st.markdown(f"""
-            <div style='background-color: {bg_color}; padding: 15px; border-radius: 10px; border-left: 5px solid {border_color};'>
-                <h4>{header_text}</h4>
-                <ul>
-                    <li><b>Status Water Balance:</b> Error {last_error:.1f}%.</li>
-                    <li><b>Curah Hujan Hari Ini:</b> {rain_today} mm.</li>
-                    <li><b>Status Elevasi:</b> {last['Elevasi Air (m)']} m.</li>
-                </ul>
-            </div>
-            """, unsafe_allow_html=True)
-
-        # Render Right Box (Recommendation)
-        with col_rec:
-            st.markdown(f"""
-            <div style='background-color: #fef9e7; padding: 15px; border-radius: 10px; border-left: 5px solid #f1c40f;'>
-                <h4>🛠️ REKOMENDASI</h4>
-            """, unsafe_allow_html=True)
-            
-            rec_list = []
-            
-            # Logic for recommendations
-            if is_wb_critical:
-                rec_list.append("🔴 <b>CEK INPUT DATA (HUMAN ERROR):</b> Pastikan angka Elevasi, Debit, dan Hujan yang diinput sudah benar.")
-                rec_list.append("🔴 <b>Cek Groundwater:</b> Apakah ada air tanah/rembesan besar yang belum diinput di kolom Groundwater?")
-                rec_list.append("🔴 <b>Cek Debit Pompa:</b> Verifikasi flowmeter pompa.")
-            
-            if last['Elevasi Air (m)'] >= last['Critical Elevation (m)']:
-                rec_list.append("⛔ <b>STOP OPERASI & EVAKUASI UNIT.</b>")
-            
-            if not rec_list:
-                st.markdown("- ✅ Data Valid & Operasi Aman.")
-            else:
-                for r in rec_list:
-                    st.markdown(f"- {r}", unsafe_allow_html=True)
-            
-            st.markdown("</div>", unsafe_allow_html=True)
-
-# TAB 2: INPUT
-with tab_input:
-    if not st.session_state['logged_in']:
-        ui.render_login_form("input")
-    else:
-        st.info("Input Data Harian (Saved to Neon Cloud)")
-        with st.expander("➕ Input Harian Baru", expanded=True):
-            d_in = st.date_input("Tanggal", date.today())
-            
-            # --- FIXED LOGIC FOR SUMP SELECTION ---
-            # Get existing sumps for this site
-            existing_sumps = st.session_state['site_map'].get(selected_site, [])
-            
-            p_in = None # Variable to hold the final chosen sump name
-            
-            # If no sumps exist (New Site), force Text Input
-            if not existing_sumps:
-                st.warning(f"Belum ada Sump di {selected_site}. Silakan buat baru.")
-                p_in = st.text_input("Nama Sump Baru (Wajib Diisi)", placeholder="Contoh: Sump Utara")
-            else:
-                # If sumps exist, allow user to choose or create new
-                mode_input = st.radio("Mode Input Sump:", ["Pilih Sump Ada", "Buat Sump Baru"], horizontal=True)
-                
-                if mode_input == "Pilih Sump Ada":
-                    p_in = st.selectbox("Pilih Sump", existing_sumps)
-                else:
-                    p_in = st.text_input("Nama Sump Baru", placeholder="Contoh: Sump Selatan")
-
-            # --- FORM INPUT ---
-            # Only show forms if p_in is valid (not empty string)
-            if p_in:
-                cl, cr = st.columns(2)
-                with cl:
-                    with st.form("fs"):
-                        st.markdown(f"<b>Data Sump: {p_in}</b>", unsafe_allow_html=True)
-                        e_a = st.number_input("Elevasi (m)", format="%.2f")
-                        v_a = st.number_input("Volume Survey (m3)", step=100)
-                        r_p = st.number_input("Rain Plan (mm)", value=20.0)
-                        r_a = st.number_input("Rain Act (mm)", 0.0)
-                        gw_v = st.number_input("Groundwater (m3)", 0.0)
-                        
-                        if st.form_submit_button("Simpan Sump"):
-                            new = {
-                                "Tanggal": pd.to_datetime(d_in), "Site": selected_site, "Pit": p_in,
-                                "Elevasi Air (m)": e_a, "Critical Elevation (m)": 13.0,
-                                "Volume Air Survey (m3)": v_a, "Plan Curah Hujan (mm)": r_p,
-                                "Curah Hujan (mm)": r_a, "Actual Catchment (Ha)": 25.0,
-                                "Groundwater (m3)": gw_v,
-                                "Status": "BAHAYA" if e_a > 13 else "AMAN"
-                            }
-                            db.save_new_sump(new)
-                            
-                            # Refresh Data & Site Map immediately
-                            st.session_state['data_sump'], _ = db.load_data()
-                            # Rebuild map so the new sump appears in dropdowns next time
-                            st.session_state.pop('site_map', None)
-                            
-                            st.success(f"Sump '{p_in}' Saved!")
-                            st.rerun()
-
-                with cr:
-                    with st.form("fp"):
-                        st.markdown(f"<b>Data Pompa: {p_in}</b>", unsafe_allow_html=True)
-                        uc = st.text_input("Unit Code (e.g., WP-01)")
-                        dp = st.number_input("Debit Plan (m3/h)", value=500)
-                        da = st.number_input("Debit Actual (m3/h)", 0)
-                        ea = st.number_input("EWH Actual (Jam)", 0.0)
-                        
-                        if st.form_submit_button("Simpan Pompa"):
-                            newp = {
-                                "Tanggal": pd.to_datetime(d_in), "Site": selected_site, "Pit": p_in,
-                                "Unit Code": uc, "Debit Plan (m3/h)": dp, "Debit Actual (m3/h)": da,
-                                "EWH Plan": 20.0, "EWH Actual": ea
-                            }
-                            db.save_new_pompa(newp)
-                            _, st.session_state['data_pompa'] = db.load_data() # Reload
-                            st.success(f"Pompa for '{p_in}' Saved!")
-                            st.rerun()
-            else:
-                if not existing_sumps:
-                    st.info("Silakan ketik nama Sump baru di atas untuk memulai.")
-
-        st.divider()
-        st.markdown("### 🛠️ Bulk Edit (Delete Data here)")
-        st.caption("Tips: Select rows and press 'Delete' on your keyboard to remove data. Click Update to save changes.")
-        
-        t1, t2 = st.tabs(["Edit Sump", "Edit Pompa"])
-        with t1:
-            # Sump Editor
-            curr_s = st.session_state.data_sump[st.session_state.data_sump['Site']==selected_site]
-            ed_s = st.data_editor(curr_s, num_rows="dynamic", key="es")
-            
-            if st.button("💾 UPDATE SUMP DB"):
-                full_s = pd.concat([st.session_state.data_sump[st.session_state.data_sump['Site']!=selected_site], ed_s], ignore_index=True)
-                db.overwrite_full_db(full_s, st.session_state.data_pompa)
-                st.session_state['data_sump'] = full_s
-                
-                # Rebuild map in case sumps were renamed or deleted
-                st.session_state.pop('site_map', None)
-                st.success("Updated!"); st.rerun()
-                
-        with t2:
-            # Pompa Editor
-            curr_p = st.session_state.data_pompa[st.session_state.data_pompa['Site']==selected_site]
-            ed_p = st.data_editor(curr_p, num_rows="dynamic", key="ep")
-            
-            if st.button("💾 UPDATE POMPA DB"):
-                full_p = pd.concat([st.session_state.data_pompa[st.session_state.data_pompa['Site']!=selected_site], ed_p], ignore_index=True)
-                db.overwrite_full_db(st.session_state.data_sump, full_p)
-                st.session_state['data_pompa'] = full_p
-                st.success("Updated!"); st.rerun()
-
-# TAB 3: DATABASE
-with tab_db:
-    st.info("📂 Source: Neon PostgreSQL")
-    c1, c2 = st.columns(2)
-    c1.download_button("Download Sump CSV", st.session_state.data_sump.to_csv(index=False), "sump.csv")
-    c2.download_button("Download Pompa CSV", st.session_state.data_pompa.to_csv(index=False), "pompa.csv")
-    st.dataframe(st.session_state.data_sump)
-
-# TAB 4: ADMIN / SETTINGS
-with tab_admin:
-    st.markdown("### ⚙️ System Settings")
-    
-    if st.session_state['logged_in']:
-        # Section 1: Manage Sites
-        st.markdown("#### 🏗️ Manage Sites")
-        ns = st.text_input("New Site Name")
-        if st.button("Add Site") and ns: st.session_state['site_map'][ns] = []
-        
-        st.divider()
-        
-        # Section 2: Developer Tools
-        st.markdown("#### 🧪 Developer Tools")
-        
-        c_dev1, c_dev2 = st.columns(2)
-        
-        with c_dev1:
-            st.info("Gunakan ini untuk mengisi data grafik.")
-            if st.button("Generate Dummy Data", type="primary", use_container_width=True):
-                try:
-                    with st.spinner("Generating data..."):
-                        db.generate_dummy_data()
-                        # Reload Data
-                        df_s, df_p = db.load_data()
-                        st.session_state['data_sump'] = df_s
-                        st.session_state['data_pompa'] = df_p
-                        st.session_state.pop('site_map', None) 
-                    st.success("Dummy data generated!")
-                    st.rerun()
-                except Exception as e:
-                    st.error(f"Error: {e}")
-                    st.error("Tip: Try 'Reset Database' below if this fails.")
-                
-        with c_dev2:
-            st.info("Hapus hanya data dummy.")
-            if st.button("Delete Dummy Data", type="secondary", use_container_width=True):
-                with st.spinner("Cleaning up..."):
-                    db.delete_dummy_data()
-                    df_s, df_p = db.load_data()
-                    st.session_state['data_sump'] = df_s
-                    st.session_state['data_pompa'] = df_p
-                    st.session_state.pop('site_map', None) 
-                st.warning("Dummy data deleted.")
-                st.rerun()
-
-        st.divider()
-        st.markdown("#### ⚠️ Danger Zone")
-        with st.expander("Reset Database (Fix Schema Errors)"):
-            st.warning("This will DELETE ALL DATA (Real & Dummy) and recreate empty tables. Use this if you get 'ProgrammingError' or 'Column missing' errors.")
-            if st.button("🔴 RESET DATABASE (DROP TABLES)", type="primary"):
-                with st.spinner("Resetting Database..."):
-                    db.reset_db()
-                    st.session_state.clear() # Clear session to force full reload
-                st.success("Database has been reset. Please refresh the page.")
-                
-    else:
-        ui.render_login_form("adm")
+import streamlit as st
+import pandas as pd
+from datetime import date, timedelta
+import os
+
+# Import Modules
+import database as db
+import processing as proc
+import ui
+
+# --- 1. CONFIG & SETUP ---
+st.set_page_config(
+    page_title="Bara Tama Wijaya Water Management",
+    page_icon="🔥",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+ui.load_css()
+
+# --- 2. CHANGE SYNC ---
+CHANGE_POLL_SECONDS = 15
+
+def sync_changes():
+    """
+    Brings data_sump / data_pompa up to date with the DB by reloading only the
+    (Site, Pit) pairs written since this session's data version.
+    Returns: True if anything changed
+    """
+    version = db.load_data_version()
+    seen = st.session_state.get('data_version', 0)
+    if version == seen:
+        return False
+    if version < seen:
+        # Counter went backwards: data_version itself was recreated, reload everything
+        pairs, (df_s, df_p) = None, db.load_data()
+    else:
+        version, pairs, df_s, df_p = db.load_changes(seen)
+    if pairs is None:
+        # Reset since the last sync: replace everything
+        st.session_state['data_sump'], st.session_state['data_pompa'] = df_s, df_p
+        st.session_state['summary_years'] = db.load_summary_years()
+        st.session_state['data_version'] = version
+        st.session_state.pop('site_map', None)
+        return True
+
+    old_pairs = set(proc.site_pit_pairs(st.session_state.data_sump))
+    st.session_state['data_sump'] = proc.apply_site_pit_delta(st.session_state.data_sump, df_s, pairs)
+    st.session_state['data_pompa'] = proc.apply_site_pit_delta(st.session_state.data_pompa, df_p, pairs)
+    st.session_state['data_version'] = version
+    # Rebuild the site map only if a sump appeared or disappeared
+    if set(proc.site_pit_pairs(st.session_state.data_sump)) != old_pairs:
+        st.session_state.pop('site_map', None)
+    return True
+
+@st.fragment(run_every=CHANGE_POLL_SECONDS)
+def watch_changes():
+    """Polls the data version; a full rerun only happens when another session wrote something."""
+    if sync_changes():
+        st.rerun()
+
+# --- 3. SESSION STATE & DATA LOADING ---
+if 'data_sump' not in st.session_state or 'data_pompa' not in st.session_state:
+    try:
+        # Version first: anything written during the load is picked up by the next sync
+        st.session_state['data_version'] = db.load_data_version()
+        df_s, df_p = db.load_data()
+        st.session_state['data_sump'] = df_s
+        st.session_state['data_pompa'] = df_p
+        st.session_state['summary_years'] = db.load_summary_years()
+    except Exception as e:
+        st.error(f"Gagal koneksi ke Neon DB: {e}")
+        st.stop()
+else:
+    # Full reruns start from current data; watch_changes covers idle sessions
+    sync_changes()
+
+if db.blocked_key_indexes:
+    st.error(f"⚠️ Data duplikat menghalangi index kunci ({', '.join(sorted(db.blocked_key_indexes))}); penyimpanan data akan gagal. Admin: jalankan 'Compact Duplicates' di tab Setting.")
+
+if 'logged_in' not in st.session_state: st.session_state['logged_in'] = False
+if 'username' not in st.session_state: st.session_state['username'] = ''
+if 'site_map' not in st.session_state:
+    # Build dynamic site map from DB data
+    if not st.session_state.data_sump.empty:
+        existing_sites = st.session_state.data_sump['Site'].unique()
+        current_map = {}
+        for s in existing_sites:
+            pits = st.session_state.data_sump[st.session_state.data_sump['Site'] == s]['Pit'].unique().tolist()
+            current_map[s] = pits
+        st.session_state['site_map'] = current_map
+    else:
+        st.session_state['site_map'] = {}
+
+# --- 4. SECTIONS ---
+# Each section is a fragment: interacting with a widget inside it reruns only
+# that section. Sections that change shared data or filters trigger a full
+# rerun (st.rerun) so dependent sections pick up the change.
+
+@st.fragment
+def render_sidebar():
+    st.markdown("## 🏢 BARA TAMA WIJAYA")
+    if st.session_state['logged_in']:
+        st.success(f"👤 Login: {st.session_state['username']}")
+        if st.button("Logout", use_container_width=True):
+            st.session_state['logged_in'] = False; st.rerun()
+    else:
+        st.info("👀 Mode: View Only")
+    
+    st.divider()
+    
+    # FILTERS
+    current_sites = list(st.session_state['site_map'].keys())
+    selected_site = st.selectbox("📍 Pilih Site", current_sites) if current_sites else None
+    
+    pit_options = ["All Sumps"]
+    if selected_site and selected_site in st.session_state['site_map']: 
+        pit_options += st.session_state['site_map'][selected_site]
+    selected_pit = st.selectbox("💧 Pilih Sump", pit_options)
+
+    # Unit Filter Logic
+    unit_options = ["All Units"]
+    if selected_pit != "All Sumps" and not st.session_state.data_pompa.empty:
+        raw_p = st.session_state.data_pompa
+        avail_units = raw_p[(raw_p['Site'] == selected_site) & (raw_p['Pit'] == selected_pit)]['Unit Code'].unique().tolist()
+        unit_options += sorted(avail_units)
+    selected_unit = st.selectbox("🚜 Pilih Unit Pompa", unit_options)
+    
+    # Date Filter
+    avail_years = set(st.session_state.data_sump['Tanggal'].dt.year.unique()) if not st.session_state.data_sump.empty else {date.today().year}
+    avail_years = sorted(avail_years | set(st.session_state.get('summary_years', [])), reverse=True)
+    sel_year = st.selectbox("📅 Tahun", avail_years)
+    month_map = {1:"Januari", 2:"Februari", 3:"Maret", 4:"April", 5:"Mei", 6:"Juni", 7:"Juli", 8:"Agustus", 9:"September", 10:"Oktober", 11:"November", 12:"Desember"}
+    curr_m = date.today().month
+    sel_month_name = st.selectbox("🗓️ Bulan", list(month_map.values()), index=curr_m-1)
+    sel_month_int = [k for k,v in month_map.items() if v==sel_month_name][0]
+
+    # Publish the filters for the other sections. A change made from inside this
+    # fragment only reaches them through a full rerun.
+    filters = (selected_site, selected_pit, selected_unit, sel_year, sel_month_int)
+    prev_filters = st.session_state.get('filters')
+    st.session_state['filters'] = filters
+    if prev_filters is not None and prev_filters != filters:
+        st.rerun()
+
+def _month_data(selected_site, sel_year, sel_month_int):
+    """Session data, or the month's rows from the DB for a month before the session window."""
+    if date(sel_year, sel_month_int, 1) >= db.retention_cutoff():
+        return st.session_state.data_sump, st.session_state.data_pompa
+    key = (selected_site, sel_year, sel_month_int, st.session_state.get('data_version'))
+    cached = st.session_state.get('old_month')
+    if cached is None or cached[0] != key:
+        cached = (key, *db.load_month(selected_site, sel_year, sel_month_int))
+        st.session_state['old_month'] = cached
+    return cached[1], cached[2]
+
+@st.fragment
+def render_dashboard(selected_site, selected_pit, selected_unit, sel_year, sel_month_int):
+    df_wb_dash, df_p_display, title_suffix = proc.process_water_balance(
+        *_month_data(selected_site, sel_year, sel_month_int),
+        selected_site, selected_pit, selected_unit, sel_year, sel_month_int
+    )
+
+    df_summary = db.load_sump_summary(selected_site, sel_year, sel_month_int) if df_wb_dash.empty else None
+    if df_summary is not None and not df_summary.empty:
+        # Month already archived: only the monthly rollup is kept in the hot tables
+        st.info("🗄️ Data harian bulan ini sudah diarsipkan. Menampilkan ringkasan bulanan.")
+        if selected_pit != "All Sumps":
+            df_summary = df_summary[df_summary['Pit'] == selected_pit]
+        st.dataframe(df_summary.drop(columns=['Bulan', 'Site']), use_container_width=True, hide_index=True)
+    elif df_wb_dash.empty:
+        st.warning("⚠️ Data belum tersedia untuk filter ini. Silakan generate dummy data di tab Setting atau input manual.")
+    else:
+        last = df_wb_dash.iloc[-1]
+        
+        # --- HEADER ---
+        st.markdown(f"<div class='date-header'>📅 Dashboard Status per Tanggal: {last['Tanggal'].strftime('%d %B %Y')}</div>", unsafe_allow_html=True)
+        
+        # --- METRICS ---
+        c1, c2, c3, c4, c5 = st.columns(5)
+        c1.metric("Elevasi Air", f"{last['Elevasi Air (m)']} m", f"Crit: {last['Critical Elevation (m)']}")
+        c2.metric("Vol Survey", f"{last['Volume Air Survey (m3)']:,.0f} m³")
+        
+        # Rain metrics
+        rain_today = last['Curah Hujan (mm)']
+        rain_mtd = df_wb_dash['Curah Hujan (mm)'].sum()
+        c3.metric("Rain Today", f"{rain_today} mm")
+        c4.metric("Rain MTD", f"{rain_mtd} mm")
+        
+        # Status Box
+        status_txt = "AMAN"; clr = "#27ae60"
+        if last['Status'] == "BAHAYA": clr = "#e74c3c"; status_txt = "BAHAYA"
+        c5.markdown(f"<div style='background-color:{clr};color:white;padding:20px;border-radius:5px;text-align:center;font-weight:bold;'>{status_txt}</div>", unsafe_allow_html=True)
+        
+        st.markdown("---")
+
+        # --- RESTORED: WATER BALANCE WARNING BANNER ---
+        last_error = last['Error %']
+        is_wb_critical = False
+        
+        # Logic: If error > 5% or is NaN (Not a Number), show warning
+        if last_error > 5.0 or pd.isna(last_error):
+            is_wb_critical = True
+            st.markdown(f"""
+            <div class="wb-alert" style='background-color: #ffcccc; color: #cc0000; padding: 10px; border-radius: 5px; font-weight: bold; margin-bottom: 10px; border: 1px solid #ff0000;'>
+                ⚠️ PERINGATAN WATER BALANCE: Error {last_error:.1f}% (Melebihi Toleransi 5%)<br>
+                Selisih Volume: {last['Diff Volume']:,.0f} m³
+            </div>
+            """, unsafe_allow_html=True)
+            
+        # --- CHARTS (From ui.py) ---
+        ui.render_charts(df_wb_dash, df_p_display, title_suffix)
+
+        # --- RESTORED: DETAIL TABLE ---
+        with st.expander("📋 Lihat Detail Angka Water Balance"):
+            df_show = df_wb_dash[['Tanggal', 'Volume Air Survey (m3)', 'Volume Teoritis', 'Diff Volume', 'Error %']].copy()
+            df_show['Tanggal'] = df_show['Tanggal'].dt.strftime('%d-%m-%Y')
+            
+            # Formatting for nicer display
+            st.dataframe(
+                df_show.style.format({
+                    'Volume Air Survey (m3)': '{:,.0f}',
+                    'Volume Teoritis': '{:,.0f}', 
+                    'Diff Volume': '{:,.0f}',
+                    'Error %': '{:.1f}%'
+                }), 
+                hide_index=True, 
+                use_container_width=True
+            )
+
+        # --- RESTORED: ANALYSIS & RECOMMENDATION BOXES ---
+        st.markdown("---")
+        st.subheader("🧠 Analisa & Rekomendasi")
+        
+        col_an, col_rec = st.columns(2)
+        
+        # Determine Status for Boxes
+        if is_wb_critical:
+            style_box = "danger-box" # CSS class defined in ui.py
+            header_text = "🚨 PERINGATAN: DATA TIDAK BALANCE"
+            bg_color = "#fdedec"
+            border_color = "#e74c3c"
+        elif last['Elevasi Air (m)'] >= last['Critical Elevation (m)']:
+            style_box = "danger-box"
+            header_text = "🚨 BAHAYA: ELEVASI TINGGI"
+            bg_color = "#fdedec"
+            border_color = "#e74c3c"
+        else:
+            style_box = "analysis-box"
+            header_text = "✅ KONDISI AMAN"
+            bg_color = "#e8f6f3"
+            border_color = "#1abc9c"
+
+        # Render Left Box (Analysis)
+        with col_an:
+            st.markdown(f"""
+            <div style='background-color: {bg_color}; padding: 15px; border-radius: 10px; border-left: 5px solid {border_color};'>
+                <h4>{header_text}</h4>
+                <ul>
+                    <li><b>Status Water Balance:</b> Error {last_error:.1f}%.</li>
+                    <li><b>Curah Hujan Hari Ini:</b> {rain_today} mm.</li>
+                    <li><b>Status Elevasi:</b> {last['Elevasi Air (m)']} m.</li>
+                </ul>
+            </div>
+            """, unsafe_allow_html=True)
+
+        # Render Right Box (Recommendation)
+        with col_rec:
+            st.markdown(f"""
+            <div style='background-color: #fef9e7; padding: 15px; border-radius: 10px; border-left: 5px solid #f1c40f;'>
+                <h4>🛠️ REKOMENDASI</h4>
+            """, unsafe_allow_html=True)
+            
+            rec_list = []
+            
+            # Logic for recommendations
+            if is_wb_critical:
+                rec_list.append("🔴 <b>CEK INPUT DATA (HUMAN ERROR):</b> Pastikan angka Elevasi, Debit, dan Hujan yang diinput sudah benar.")
+                rec_list.append("🔴 <b>Cek Groundwater:</b> Apakah ada air tanah/rembesan besar yang belum diinput di kolom Groundwater?")
+                rec_list.append("🔴 <b>Cek Debit Pompa:</b> Verifikasi flowmeter pompa.")
+            
+            if last['Elevasi Air (m)'] >= last['Critical Elevation (m)']:
+                rec_list.append("⛔ <b>STOP OPERASI & EVAKUASI UNIT.</b>")
+            
+            if not rec_list:
+                st.markdown("- ✅ Data Valid & Operasi Aman.")
+            else:
+                for r in rec_list:
+                    st.markdown(f"- {r}", unsafe_allow_html=True)
+            
+            st.markdown("</div>", unsafe_allow_html=True)
+
+@st.fragment
+def render_overview(selected_site, sel_year, sel_month_int):
+    # Every pit of the site from one grouped pass over the session data
+    df_daily, df_pits = proc.site_overview(
+        *_month_data(selected_site, sel_year, sel_month_int), selected_site, sel_year, sel_month_int
+    )
+    ui.render_sump_grid(df_daily, df_pits, date(sel_year, sel_month_int, 1).strftime('%m/%Y'))
+
+@st.fragment
+def render_fleet(sel_year, sel_month_int):
+    # Served from the monthly pump cube, not from raw pompa rows
+    df_fleet = proc.fleet_performance(db.load_fleet_cube(sel_year, sel_month_int))
+    ui.render_fleet_ranking(df_fleet, date(sel_year, sel_month_int, 1).strftime('%m/%Y'))
+
+@st.fragment
+def render_input_forms(selected_site):
+    st.info("Input Data Harian (Saved to Neon Cloud)")
+    with st.expander("➕ Input Harian Baru", expanded=True):
+        d_in = st.date_input("Tanggal", date.today())
+        
+        # --- FIXED LOGIC FOR SUMP SELECTION ---
+        # Get existing sumps for this site
+        existing_sumps = st.session_state['site_map'].get(selected_site, [])
+        
+        p_in = None # Variable to hold the final chosen sump name
+        
+        # If no sumps exist (New Site), force Text Input
+        if not existing_sumps:
+            st.warning(f"Belum ada Sump di {selected_site}. Silakan buat baru.")
+            p_in = st.text_input("Nama Sump Baru (Wajib Diisi)", placeholder="Contoh: Sump Utara")
+        else:
+            # If sumps exist, allow user to choose or create new
+            mode_input = st.radio("Mode Input Sump:", ["Pilih Sump Ada", "Buat Sump Baru"], horizontal=True)
+            
+            if mode_input == "Pilih Sump Ada":
+                p_in = st.selectbox("Pilih Sump", existing_sumps)
+            else:
+                p_in = st.text_input("Nama Sump Baru", placeholder="Contoh: Sump Selatan")
+
+        # --- FORM INPUT ---
+        # Only show forms if p_in is valid (not empty string)
+        if p_in:
+            cl, cr = st.columns(2)
+            with cl:
+                with st.form("fs"):
+                    st.markdown(f"<b>Data Sump: {p_in}</b>", unsafe_allow_html=True)
+                    e_a = st.number_input("Elevasi (m)", format="%.2f")
+                    v_a = st.number_input("Volume Survey (m3)", step=100)
+                    r_p = st.number_input("Rain Plan (mm)", value=20.0)
+                    r_a = st.number_input("Rain Act (mm)", 0.0)
+                    gw_v = st.number_input("Groundwater (m3)", 0.0)
+                    
+                    if st.form_submit_button("Simpan Sump"):
+                        new = {
+                            "Tanggal": pd.to_datetime(d_in), "Site": selected_site, "Pit": p_in,
+                            "Elevasi Air (m)": e_a, "Critical Elevation (m)": 13.0,
+                            "Volume Air Survey (m3)": v_a, "Plan Curah Hujan (mm)": r_p,
+                            "Curah Hujan (mm)": r_a, "Actual Catchment (Ha)": 25.0,
+                            "Groundwater (m3)": gw_v,
+                            "Status": "BAHAYA" if e_a > 13 else "AMAN"
+                        }
+                        db.save_new_sump(new)
+                        
+                        # Refresh the changed sump (and the site map if it is new)
+                        sync_changes()
+                        
+                        st.success(f"Sump '{p_in}' Saved!")
+                        st.rerun()
+
+            with cr:
+                with st.form("fp"):
+                    st.markdown(f"<b>Data Pompa: {p_in}</b>", unsafe_allow_html=True)
+                    uc = st.text_input("Unit Code (e.g., WP-01)")
+                    dp = st.number_input("Debit Plan (m3/h)", value=500)
+                    da = st.number_input("Debit Actual (m3/h)", 0)
+                    ea = st.number_input("EWH Actual (Jam)", 0.0)
+                    
+                    if st.form_submit_button("Simpan Pompa"):
+                        newp = {
+                            "Tanggal": pd.to_datetime(d_in), "Site": selected_site, "Pit": p_in,
+                            "Unit Code": uc, "Debit Plan (m3/h)": dp, "Debit Actual (m3/h)": da,
+                            "EWH Plan": 20.0, "EWH Actual": ea
+                        }
+                        db.save_new_pompa(newp)
+                        sync_changes()
+                        st.success(f"Pompa for '{p_in}' Saved!")
+                        st.rerun()
+        else:
+            if not existing_sumps:
+                st.info("Silakan ketik nama Sump baru di atas untuk memulai.")
+
+def _site_rows(data, site):
+    return data[data['Site'] == site].reset_index(drop=True)
+
+def _has_unsaved_edits(editor_key):
+    state = st.session_state.get(editor_key) or {}
+    return any(state.get(k) for k in ('edited_rows', 'added_rows', 'deleted_rows'))
+
+def _editor_page(kind, selected_site, window, page, page_size, editor_key):
+    """
+    Bulk-editor page for (site, window, page), fetched from the DB once and kept until saved or refreshed.
+    Returns: (rows, total row count, stale) where stale means another write touched
+    the site while this page had unsaved edits
+    """
+    load = db.load_sump_page if kind == 'sump' else db.load_pompa_page
+    data = st.session_state['data_sump' if kind == 'sump' else 'data_pompa']
+    page_key = (selected_site, window, page, page_size)
+    cached = st.session_state.get(f'edit_page_{kind}')
+    if cached is not None and cached[0] == page_key and cached[1] is not data:
+        # A save or a synced change replaced data_sump / data_pompa: refetch only if it
+        # touched this site, and never under unsaved edits
+        if _site_rows(cached[1], selected_site).equals(_site_rows(data, selected_site)):
+            cached = (page_key, data, cached[2], cached[3])
+            st.session_state[f'edit_page_{kind}'] = cached
+        elif not _has_unsaved_edits(editor_key):
+            cached = None
+    if cached is None or cached[0] != page_key:
+        df, total = load(selected_site, window[0], window[1], page, page_size)
+        cached = (page_key, data, df, total)
+        st.session_state[f'edit_page_{kind}'] = cached
+    return cached[2], cached[3], cached[1] is not data
+
+def _render_page_editor(kind, selected_site, window, page_size):
+    keys = db.SUMP_KEY if kind == 'sump' else db.POMPA_KEY
+    data_key = 'data_sump' if kind == 'sump' else 'data_pompa'
+
+    page_no_key = f'edit_page_no_{kind}'
+    page = st.session_state.get(page_no_key, 1) - 1
+    editor_key = f"e{kind[0]}_{selected_site}_{window}_{page}_{page_size}"
+    df_page, total, stale = _editor_page(kind, selected_site, window, page, page_size, editor_key)
+    n_pages = max(1, -(-total // page_size))
+    if page >= n_pages:
+        page = n_pages - 1
+        st.session_state[page_no_key] = n_pages
+        editor_key = f"e{kind[0]}_{selected_site}_{window}_{page}_{page_size}"
+        df_page, total, stale = _editor_page(kind, selected_site, window, page, page_size, editor_key)
+
+    c_pg, c_info = st.columns([1, 3])
+    c_pg.number_input("Halaman", min_value=1, max_value=n_pages, key=page_no_key)
+    c_info.caption(f"{total} baris dalam periode ini • halaman {page + 1} dari {n_pages}")
+
+    if stale:
+        c_msg, c_btn = st.columns([3, 1])
+        c_msg.warning("Data site ini diubah di sesi lain sejak halaman dibuka. Menyimpan akan menimpa perubahan itu.")
+        if c_btn.button("🔄 Refresh (buang edit)", key=f"refresh_{kind}"):
+            st.session_state.pop(f'edit_page_{kind}', None)
+            st.session_state.pop(editor_key, None)
+            st.rerun()
+
+    ed = st.data_editor(df_page, num_rows="dynamic", key=editor_key)
+
+    if st.button(f"💾 UPDATE {kind.upper()} DB"):
+        # Blank rows added in the editor are ignored; a cleared key cell is an error,
+        # otherwise the row would be deleted without being re-inserted. Typed values
+        # that do not parse (e.g. free text in Tanggal) count as cleared
+        ed = db.normalize_types(ed.dropna(how='all'))
+        ed['Site'] = ed['Site'].fillna(selected_site)
+        missing_key = ed[keys].replace('', None).isna().any(axis=1)
+        if missing_key.any():
+            st.error(f"{int(missing_key.sum())} baris punya kolom kunci kosong ({', '.join(keys)}). Lengkapi dulu sebelum menyimpan; untuk menghapus baris, hapus seluruh barisnya.")
+            return
+        save = db.save_sump_page if kind == 'sump' else db.save_pompa_page
+        save(df_page, ed)
+        st.session_state[data_key] = proc.apply_page_edit(st.session_state[data_key], df_page, ed, keys)
+        st.session_state.pop(editor_key, None)
+        st.session_state.pop(f'edit_page_{kind}', None)
+
+        # Rebuild map in case sumps were renamed or deleted
+        if kind == 'sump':
+            st.session_state.pop('site_map', None)
+        st.success("Updated!"); st.rerun()
+
+@st.fragment
+def render_bulk_editor(selected_site):
+    st.markdown("### 🛠️ Bulk Edit (Delete Data here)")
+    st.caption("Tips: Select rows and press 'Delete' on your keyboard to remove data. Click Update to save changes.")
+
+    # Only the selected date window and page are fetched; saving commits that page only
+    c_win, c_size = st.columns([3, 1])
+    today = date.today()
+    window = c_win.date_input("Periode", (today - timedelta(days=30), today), key="edit_window")
+    page_size = c_size.selectbox("Baris / halaman", [50, 100, 200], index=1, key="edit_page_size")
+    if not isinstance(window, tuple) or len(window) != 2:
+        st.info("Pilih tanggal awal dan akhir periode.")
+        return
+
+    t1, t2 = st.tabs(["Edit Sump", "Edit Pompa"])
+    with t1:
+        _render_page_editor('sump', selected_site, window, page_size)
+    with t2:
+        _render_page_editor('pompa', selected_site, window, page_size)
+
+@st.fragment
+def render_database():
+    st.info("📂 Source: Neon PostgreSQL")
+    st.caption(f"Data sesi sejak {db.retention_cutoff():%d/%m/%Y}; bulan yang lebih lama dibaca per bulan di Dashboard.")
+    c1, c2 = st.columns(2)
+    # CSV is serialized on click (callable), not on every rerun
+    df_s, df_p = st.session_state.data_sump, st.session_state.data_pompa
+    c1.download_button("Download Sump CSV", lambda: df_s.to_csv(index=False), "sump.csv", on_click="ignore")
+    c2.download_button("Download Pompa CSV", lambda: df_p.to_csv(index=False), "pompa.csv", on_click="ignore")
+    st.dataframe(df_s)
+
+@st.fragment
+def render_settings():
+    st.markdown("### ⚙️ System Settings")
+    
+    if st.session_state['logged_in']:
+        # Section 1: Manage Sites
+        st.markdown("#### 🏗️ Manage Sites")
+        ns = st.text_input("New Site Name")
+        if st.button("Add Site") and ns:
+            st.session_state['site_map'][ns] = []
+            st.rerun() # Sidebar lists the new site
+        
+        st.divider()
+        
+        # Section 2: Developer Tools
+        st.markdown("#### 🧪 Developer Tools")
+        
+        c_dev1, c_dev2 = st.columns(2)
+        
+        with c_dev1:
+            st.info("Gunakan ini untuk mengisi data grafik.")
+            if st.button("Generate Dummy Data", type="primary", use_container_width=True):
+                try:
+                    with st.spinner("Generating data..."):
+                        db.generate_dummy_data()
+                        sync_changes()
+                    st.success("Dummy data generated!")
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"Error: {e}")
+                    st.error("Tip: Try 'Reset Database' below if this fails.")
+                
+        with c_dev2:
+            st.info("Hapus hanya data dummy.")
+            if st.button("Delete Dummy Data", type="secondary", use_container_width=True):
+                with st.spinner("Cleaning up..."):
+                    db.delete_dummy_data()
+                    sync_changes()
+                st.warning("Dummy data deleted.")
+                st.rerun()
+
+        st.divider()
+        st.markdown("#### 🧹 Maintenance")
+        st.caption("Gabungkan baris duplikat (Tanggal, Site, Pit[, Unit]) dari input lama. Dari tiap duplikat satu baris disimpan, "
+                   "belum tentu input terakhir; periksa datanya setelah compact.")
+        if st.button("Compact Duplicates"):
+            with st.spinner("Compacting..."):
+                removed_s, removed_p = db.compact_duplicates()
+                changed = sync_changes()
+            st.success(f"Removed {removed_s} sump and {removed_p} pompa duplicate rows.")
+            if changed:
+                st.rerun()
+
+        st.markdown("##### 🗄️ Retensi Data")
+        st.caption("Bulan yang lebih lama dari batas retensi diringkas ke tabel bulanan dan data hariannya dipindah ke arsip.")
+        keep_months = st.number_input("Simpan data harian (bulan)", min_value=1, max_value=120, value=db.RETENTION_MONTHS)
+        if st.button("Apply Retention"):
+            with st.spinner("Archiving..."):
+                archived = db.apply_retention(int(keep_months))
+                sync_changes()
+                st.session_state['summary_years'] = db.load_summary_years()
+            st.success(f"Archived {len(archived)} month(s).")
+            if archived:
+                st.rerun()
+
+        st.divider()
+        st.markdown("#### ⚠️ Danger Zone")
+        with st.expander("Reset Database (Fix Schema Errors)"):
+            st.warning("This will DELETE ALL DATA (Real & Dummy) and recreate empty tables. Use this if you get 'ProgrammingError' or 'Column missing' errors.")
+            if st.button("🔴 RESET DATABASE (DROP TABLES)", type="primary"):
+                with st.spinner("Resetting Database..."):
+                    db.reset_db()
+                    st.session_state.clear() # Clear session to force full reload
+                # Full rerun: other fragments must not run against the cleared state
+                st.rerun()
+                
+    else:
+        ui.render_login_form("adm")
+
+# --- 5. LAYOUT ---
+with st.sidebar:
+    render_sidebar()
+    watch_changes()
+selected_site, selected_pit, selected_unit, sel_year, sel_month_int = st.session_state['filters']
+
+st.markdown(f"## 🏢 Bara Tama Wijaya: {selected_site}")
+tab_dash, tab_overview, tab_fleet, tab_input, tab_db, tab_admin = st.tabs(["📊 Dashboard", "🗺️ Overview Sump", "🚜 Fleet Pompa", "📝 Input (Admin)", "📂 Database", "⚙️ Setting"])
+
+# TAB 1: DASHBOARD
+with tab_dash:
+    render_dashboard(selected_site, selected_pit, selected_unit, sel_year, sel_month_int)
+
+# TAB 2: ALL SUMPS OVERVIEW
+with tab_overview:
+    render_overview(selected_site, sel_year, sel_month_int)
+
+# TAB 3: PUMP FLEET
+with tab_fleet:
+    render_fleet(sel_year, sel_month_int)
+
+# TAB 4: INPUT
+with tab_input:
+    if not st.session_state['logged_in']:
+        ui.render_login_form("input")
+    else:
+        render_input_forms(selected_site)
+        st.divider()
+        render_bulk_editor(selected_site)
+
+# TAB 5: DATABASE
+with tab_db:
+    render_database()
+
+# TAB 6: ADMIN / SETTINGS
+with tab_admin:
+    render_settings()
@@ -2,6 +2,7 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
 from datetime import date, timedelta
 import random
 
@@ -9,22 +10,73 @@ import random
 def get_connection():
     return st.connection("neon", type="sql")
 
+def _query(conn, sql, params=None):
+    """
+    Read into a DataFrame. Unlike conn.query(), the connection is closed right
+    away: a connection left idle in transaction keeps its table locks until
+    garbage collection and blocks partition DDL (see _ensure_partitions).
+    """
+    with conn.engine.connect() as connection:
+        return pd.read_sql(text(sql), connection, params=params)
+
+SUMP_DDL = """Tanggal DATE, Site TEXT, Pit TEXT, Elevasi_Air REAL, Critical_Elevation REAL,
+             Volume_Air_Survey REAL, Plan_Curah_Hujan REAL, Curah_Hujan REAL,
+             Actual_Catchment REAL, Groundwater REAL, Status TEXT"""
+POMPA_DDL = """Tanggal DATE, Site TEXT, Pit TEXT, Unit_Code TEXT,
+              Debit_Plan REAL, Debit_Actual REAL, EWH_Plan REAL, EWH_Actual REAL"""
+RAW_TABLES = {"sump": SUMP_DDL, "pompa": POMPA_DDL}
+
+def _is_postgres(session):
+    return session.get_bind().dialect.name == "postgresql"
+
 def init_db():
     """Create tables in Neon if they don't exist."""
     conn = get_connection()
     with conn.session as session:
+        # Raw tables and their archives. On Postgres they are partitioned by month on Tanggal.
+        for table, columns in RAW_TABLES.items():
+            for name in (table, f"{table}_archive"):
+                if _is_postgres(session):
+                    _create_partitioned(session, name, columns)
+                else:
+                    session.execute(text(f"CREATE TABLE IF NOT EXISTS {name} ({columns})"))
+        # Pump performance cube: one row per unit per month (Tanggal = first day of month)
         session.execute(text('''
-            CREATE TABLE IF NOT EXISTS sump (
-                Tanggal DATE, Site TEXT, Pit TEXT, Elevasi_Air REAL, Critical_Elevation REAL,
-                Volume_Air_Survey REAL, Plan_Curah_Hujan REAL, Curah_Hujan REAL,
-                Actual_Catchment REAL, Groundwater REAL, Status TEXT
+            CREATE TABLE IF NOT EXISTS pompa_cube (
+                Tanggal DATE, Site TEXT, Pit TEXT, Unit_Code TEXT, Hari INTEGER,
+                Debit_Plan_Sum REAL, Debit_Actual_Sum REAL, EWH_Plan_Sum REAL, EWH_Actual_Sum REAL,
+                Volume_Plan REAL, Volume_Actual REAL
             )'''))
+        # Monthly sump summaries of archived months (Tanggal = first day of month)
         session.execute(text('''
-            CREATE TABLE IF NOT EXISTS pompa (
-                Tanggal DATE, Site TEXT, Pit TEXT, Unit_Code TEXT,
-                Debit_Plan REAL, Debit_Actual REAL, EWH_Plan REAL, EWH_Actual REAL
+            CREATE TABLE IF NOT EXISTS sump_bulanan (
+                Tanggal DATE, Site TEXT, Pit TEXT, Hari INTEGER, Hari_Bahaya INTEGER,
+                Elevasi_Min REAL, Elevasi_Max REAL, Elevasi_Avg REAL, Critical_Elevation REAL,
+                Volume_Air_Survey_Avg REAL, Plan_Curah_Hujan_Sum REAL, Curah_Hujan_Sum REAL, Groundwater_Sum REAL
             )'''))
+        # Change feed: one row per (Site, Pit) plus the global counter row ('*', '*')
+        session.execute(text("CREATE TABLE IF NOT EXISTS data_version (Site TEXT, Pit TEXT, Version INTEGER)"))
+        session.execute(text("""INSERT INTO data_version (Site, Pit, Version) SELECT '*', '*', 0
+                                WHERE NOT EXISTS (SELECT 1 FROM data_version WHERE Site = '*' AND Pit = '*')"""))
         session.commit()
+    _ensure_key_indexes()
+    _backfill_pompa_cube()
+
+def _ensure_key_indexes():
+    """
+    Unique natural-key indexes (needed by ON CONFLICT). An index that existing
+    duplicates block is recorded in blocked_key_indexes; merging them is left to
+    the operator (compact_duplicates), never done implicitly.
+    """
+    conn = get_connection()
+    for name, stmt in KEY_INDEXES.items():
+        try:
+            with conn.session as session:
+                session.execute(stmt)
+                session.commit()
+            blocked_key_indexes.discard(name)
+        except IntegrityError:
+            blocked_key_indexes.add(name)
 
 def reset_db():
     """DROPS and recreates tables."""
@@ -32,114 +84,628 @@ def reset_db():
     with conn.session as session:
         session.execute(text("DROP TABLE IF EXISTS sump"))
         session.execute(text("DROP TABLE IF EXISTS pompa"))
+        session.execute(text("DROP TABLE IF EXISTS pompa_cube"))
+        session.execute(text("DROP TABLE IF EXISTS sump_bulanan"))
+        session.execute(text("DROP TABLE IF EXISTS sump_archive"))
+        session.execute(text("DROP TABLE IF EXISTS pompa_archive"))
+        # data_version is kept: the counter must never go backwards for open sessions
+        session.execute(text("DELETE FROM data_version WHERE Site <> '*'"))
         session.commit()
     init_db()
+    with conn.session as session:
+        session.execute(DATA_VERSION_UPSERT, {"s": "*", "p": "reset", "v": _bump_version(session)})
+        session.commit()
+
+# Column mapping: DB column -> dashboard column
+SUMP_COLUMNS = {
+    "tanggal": "Tanggal", "site": "Site", "pit": "Pit",
+    "elevasi_air": "Elevasi Air (m)", "critical_elevation": "Critical Elevation (m)",
+    "volume_air_survey": "Volume Air Survey (m3)", "plan_curah_hujan": "Plan Curah Hujan (mm)",
+    "curah_hujan": "Curah Hujan (mm)", "actual_catchment": "Actual Catchment (Ha)",
+    "groundwater": "Groundwater (m3)", "status": "Status"
+}
+POMPA_COLUMNS = {
+    "tanggal": "Tanggal", "site": "Site", "pit": "Pit", "unit_code": "Unit Code",
+    "debit_plan": "Debit Plan (m3/h)", "debit_actual": "Debit Actual (m3/h)",
+    "ewh_plan": "EWH Plan", "ewh_actual": "EWH Actual"
+}
+CUBE_COLUMNS = {
+    "tanggal": "Bulan", "site": "Site", "pit": "Pit", "unit_code": "Unit Code", "hari": "Hari",
+    "debit_plan_sum": "Debit Plan Sum", "debit_actual_sum": "Debit Actual Sum",
+    "ewh_plan_sum": "EWH Plan Sum", "ewh_actual_sum": "EWH Actual Sum",
+    "volume_plan": "Volume Plan (m3)", "volume_actual": "Volume Actual (m3)"
+}
+
+# Natural keys (one row per day per sump / per pump unit)
+SUMP_KEY = ["Tanggal", "Site", "Pit"]
+POMPA_KEY = ["Tanggal", "Site", "Pit", "Unit Code"]
+
+KEY_INDEXES = {
+    "sump_natural_key": text("CREATE UNIQUE INDEX IF NOT EXISTS sump_natural_key ON sump (Site, Pit, Tanggal)"),
+    "pompa_natural_key": text("CREATE UNIQUE INDEX IF NOT EXISTS pompa_natural_key ON pompa (Site, Pit, Unit_Code, Tanggal)"),
+    "pompa_cube_key": text("CREATE UNIQUE INDEX IF NOT EXISTS pompa_cube_key ON pompa_cube (Site, Pit, Unit_Code, Tanggal)"),
+    "sump_bulanan_key": text("CREATE UNIQUE INDEX IF NOT EXISTS sump_bulanan_key ON sump_bulanan (Site, Pit, Tanggal)"),
+    "data_version_key": text("CREATE UNIQUE INDEX IF NOT EXISTS data_version_key ON data_version (Site, Pit)"),
+    "sump_archive_key": text("CREATE UNIQUE INDEX IF NOT EXISTS sump_archive_key ON sump_archive (Site, Pit, Tanggal)"),
+    "pompa_archive_key": text("CREATE UNIQUE INDEX IF NOT EXISTS pompa_archive_key ON pompa_archive (Site, Pit, Unit_Code, Tanggal)"),
+}
+
+# Key indexes that duplicate rows kept from being created (see compact_duplicates)
+blocked_key_indexes = set()
+
+# Writes are upserts on the natural key, so re-submitting a day replaces it instead of duplicating it
+SUMP_UPSERT = text("""INSERT INTO sump (Tanggal, Site, Pit, Elevasi_Air, Critical_Elevation, Volume_Air_Survey, 
+                   Plan_Curah_Hujan, Curah_Hujan, Actual_Catchment, Groundwater, Status) 
+                   VALUES (:t, :s, :p, :ea, :ce, :vs, :rp, :ra, :ac, :gw, :st)
+                   ON CONFLICT (Site, Pit, Tanggal) DO UPDATE SET
+                   Elevasi_Air = excluded.Elevasi_Air, Critical_Elevation = excluded.Critical_Elevation,
+                   Volume_Air_Survey = excluded.Volume_Air_Survey, Plan_Curah_Hujan = excluded.Plan_Curah_Hujan,
+                   Curah_Hujan = excluded.Curah_Hujan, Actual_Catchment = excluded.Actual_Catchment,
+                   Groundwater = excluded.Groundwater, Status = excluded.Status""")
+POMPA_UPSERT = text("""INSERT INTO pompa (Tanggal, Site, Pit, Unit_Code, Debit_Plan, Debit_Actual, EWH_Plan, EWH_Actual) 
+                    VALUES (:t, :s, :p, :uc, :dp, :da, :ep, :ea)
+                    ON CONFLICT (Site, Pit, Unit_Code, Tanggal) DO UPDATE SET
+                    Debit_Plan = excluded.Debit_Plan, Debit_Actual = excluded.Debit_Actual,
+                    EWH_Plan = excluded.EWH_Plan, EWH_Actual = excluded.EWH_Actual""")
+UPSERTS = {
+    "sump": SUMP_UPSERT, "pompa": POMPA_UPSERT,
+    "sump_archive": text(SUMP_UPSERT.text.replace("INSERT INTO sump ", "INSERT INTO sump_archive ", 1)),
+    "pompa_archive": text(POMPA_UPSERT.text.replace("INSERT INTO pompa ", "INSERT INTO pompa_archive ", 1)),
+}
+
+def _to_db_value(v):
+    """Convert pandas/numpy scalars to plain Python values for the DB driver."""
+    if v is None or (not isinstance(v, str) and pd.isna(v)):
+        return None
+    if isinstance(v, pd.Timestamp):
+        return v.date()
+    if isinstance(v, np.generic):
+        return v.item()
+    return v
+
+def _sump_params(data):
+    params = {
+        "t": data['Tanggal'], "s": data['Site'], "p": data['Pit'],
+        "ea": data['Elevasi Air (m)'], "ce": data['Critical Elevation (m)'], "vs": data['Volume Air Survey (m3)'],
+        "rp": data['Plan Curah Hujan (mm)'], "ra": data['Curah Hujan (mm)'], "ac": data['Actual Catchment (Ha)'],
+        "gw": data['Groundwater (m3)'], "st": data['Status']
+    }
+    return {k: _to_db_value(v) for k, v in params.items()}
+
+def _pompa_params(data):
+    params = {
+        "t": data['Tanggal'], "s": data['Site'], "p": data['Pit'],
+        "uc": data['Unit Code'], "dp": data['Debit Plan (m3/h)'], "da": data['Debit Actual (m3/h)'],
+        "ep": data['EWH Plan'], "ea": data['EWH Actual']
+    }
+    return {k: _to_db_value(v) for k, v in params.items()}
+
+# Dashboard columns that are not float measures
+DATE_COLUMNS = {"Tanggal", "Bulan"}
+TEXT_COLUMNS = {"Site", "Pit", "Unit Code", "Status"}
+COUNT_COLUMNS = {"Hari", "Hari Bahaya"}
+
+def normalize_types(df):
+    """
+    Cast dashboard-named columns to their types: dates to datetime64, measures to
+    float, day counts to nullable int. Unparseable values become NaT/NaN. Keeps empty frames typed, so that
+    concatenating them does not turn Tanggal into an object column.
+    """
+    df = df.copy()
+    for col in df.columns:
+        if col in DATE_COLUMNS:
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+        elif col in COUNT_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors='coerce').round().astype('Int64')
+        elif col not in TEXT_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(float)
+    return df
+
+def _prepare_frame(df, columns):
+    """Normalize a raw query result to dashboard column names and types."""
+    df.columns = map(str.lower, df.columns)
+    df = df.rename(columns=columns)
+
+    expected_cols = list(columns.values())
+    if df.empty or not all(col in df.columns for col in expected_cols):
+        df = pd.DataFrame(columns=expected_cols)
+    return normalize_types(df)
+
+# Sessions only hold the retention window; on Postgres this prunes older partitions
+SESSION_WINDOW = "(Tanggal >= :cutoff OR Tanggal IS NULL)"
 
 def load_data():
-    """Fetch all data from Neon."""
+    """Fetch the session window (months since retention_cutoff()) from Neon."""
     init_db()
     conn = get_connection()
+    params = {"cutoff": retention_cutoff()}
     
     # --- LOAD SUMP ---
     try:
-        df_s = conn.query("SELECT * FROM sump", ttl=0)
+        df_s = _query(conn, f"SELECT * FROM sump WHERE {SESSION_WINDOW}", params=params)
     except Exception:
         df_s = pd.DataFrame()
-
-    df_s.columns = map(str.lower, df_s.columns)
-    if not df_s.empty:
-        df_s['tanggal'] = pd.to_datetime(df_s['tanggal'])
-    
-    df_s = df_s.rename(columns={
-        "elevasi_air": "Elevasi Air (m)", "critical_elevation": "Critical Elevation (m)",
-        "volume_air_survey": "Volume Air Survey (m3)", "plan_curah_hujan": "Plan Curah Hujan (mm)",
-        "curah_hujan": "Curah Hujan (mm)", "actual_catchment": "Actual Catchment (Ha)",
-        "groundwater": "Groundwater (m3)", "tanggal": "Tanggal", "site": "Site", "pit": "Pit", "status": "Status"
-    })
-
-    expected_sump_cols = [
-        "Tanggal", "Site", "Pit", "Elevasi Air (m)", "Critical Elevation (m)",
-        "Volume Air Survey (m3)", "Plan Curah Hujan (mm)", "Curah Hujan (mm)",
-        "Actual Catchment (Ha)", "Groundwater (m3)", "Status"
-    ]
-    if df_s.empty or not all(col in df_s.columns for col in expected_sump_cols):
-         df_s = pd.DataFrame(columns=expected_sump_cols)
+    df_s = _prepare_frame(df_s, SUMP_COLUMNS)
 
     # --- LOAD POMPA ---
     try:
-        df_p = conn.query("SELECT * FROM pompa", ttl=0)
+        df_p = _query(conn, f"SELECT * FROM pompa WHERE {SESSION_WINDOW}", params=params)
     except Exception:
         df_p = pd.DataFrame()
-        
-    df_p.columns = map(str.lower, df_p.columns)
-    if not df_p.empty:
-        df_p['tanggal'] = pd.to_datetime(df_p['tanggal'])
-
-    df_p = df_p.rename(columns={
-        "unit_code": "Unit Code", "debit_plan": "Debit Plan (m3/h)",
-        "debit_actual": "Debit Actual (m3/h)", "ewh_plan": "EWH Plan", "ewh_actual": "EWH Actual",
-        "tanggal": "Tanggal", "site": "Site", "pit": "Pit"
-    })
-
-    expected_pompa_cols = [
-        "Tanggal", "Site", "Pit", "Unit Code", 
-        "Debit Plan (m3/h)", "Debit Actual (m3/h)", "EWH Plan", "EWH Actual"
-    ]
-    if df_p.empty or not all(col in df_p.columns for col in expected_pompa_cols):
-        df_p = pd.DataFrame(columns=expected_pompa_cols)
+    df_p = _prepare_frame(df_p, POMPA_COLUMNS)
     
     return df_s, df_p
 
+def load_month(site, year, month_int):
+    """Hot sump and pump rows of one site-month, for months before the session window."""
+    conn = get_connection()
+    m0, m1 = _month_bounds(date(year, month_int, 1))
+    where = "Site = :s AND Tanggal >= :m0 AND Tanggal < :m1"
+    params = {"s": site, "m0": m0, "m1": m1}
+    df_s = _query(conn, f"SELECT * FROM sump WHERE {where}", params=params)
+    df_p = _query(conn, f"SELECT * FROM pompa WHERE {where}", params=params)
+    return _prepare_frame(df_s, SUMP_COLUMNS), _prepare_frame(df_p, POMPA_COLUMNS)
+
+def _load_page(table, columns, order_by, site, start, end, page, page_size):
+    """Fetch one page of a site's rows between start and end (inclusive)."""
+    conn = get_connection()
+    window = "Site = :site AND Tanggal >= :start AND Tanggal < :end"
+    params = {"site": site, "start": start, "end": end + timedelta(days=1)}
+
+    total = _query(conn, f"SELECT COUNT(*) AS n FROM {table} WHERE {window}", params=params)
+    df = _query(conn,
+        f"SELECT * FROM {table} WHERE {window} ORDER BY {order_by} LIMIT :limit OFFSET :offset",
+        params={**params, "limit": page_size, "offset": page * page_size}
+    )
+    return _prepare_frame(df, columns), int(total.iloc[0, 0])
+
+def load_sump_page(site, start, end, page=0, page_size=100):
+    """Returns (rows, total row count) for one bulk-editor page of sump data."""
+    return _load_page("sump", SUMP_COLUMNS, "Tanggal DESC, Pit", site, start, end, page, page_size)
+
+def load_pompa_page(site, start, end, page=0, page_size=100):
+    """Returns (rows, total row count) for one bulk-editor page of pump data."""
+    return _load_page("pompa", POMPA_COLUMNS, "Tanggal DESC, Pit, Unit_Code", site, start, end, page, page_size)
+
+def _upsert_frame(session, table, df):
+    """
+    Executemany upsert of a dashboard-named frame into sump, pompa or their archives.
+    Rows for sump/pompa in a month that retention already archived go to the
+    archive instead, so a natural key never exists in both tables.
+    """
+    params_fn = _sump_params if table.startswith("sump") else _pompa_params
+    rows = [params_fn(row) for _, row in df.iterrows()]
+    if table in RAW_TABLES and rows:
+        archived = _archived_months(session, [r["t"] for r in rows])
+        late = [r for r in rows if r["t"] is not None and _month_bounds(r["t"]) in archived]
+        rows = [r for r in rows if r["t"] is None or _month_bounds(r["t"]) not in archived]
+        if late:
+            _upsert_rows(session, f"{table}_archive", late)
+            if table == "sump":
+                _rollup_sump(session, {_month_bounds(r["t"]) for r in late})
+    if rows:
+        _upsert_rows(session, table, rows)
+
+def _upsert_rows(session, table, rows):
+    _ensure_partitions(session, table, [r["t"] for r in rows])
+    session.execute(UPSERTS[table], rows)
+
+def _save_page(table, key_where, original, edited, params_fn, after=None):
+    """Replace one page: delete the originally loaded rows by key, upsert the edited rows."""
+    conn = get_connection()
+    with conn.session as session:
+        old_keys = [params_fn(row) for _, row in original.iterrows()]
+        if old_keys:
+            session.execute(text(f"DELETE FROM {table} WHERE {key_where}"), old_keys)
+        _upsert_frame(session, table, edited)
+        _publish_change(session, _frame_pairs(original) | _frame_pairs(edited))
+        if after:
+            after(session)
+        session.commit()
+
+def save_sump_page(original, edited):
+    """Commit an edited bulk-editor page of sump rows."""
+    _save_page("sump", "Tanggal = :t AND Site = :s AND Pit = :p",
+               original, edited, _sump_params)
+
+def save_pompa_page(original, edited):
+    """Commit an edited bulk-editor page of pump rows."""
+    cells = _cube_cells(pd.concat([original, edited]))
+    _save_page("pompa", "Tanggal = :t AND Site = :s AND Pit = :p AND Unit_Code = :uc",
+               original, edited, _pompa_params,
+               after=lambda session: _refresh_pompa_cube(session, cells))
+
 def save_new_sump(data):
-    """Insert single sump record."""
+    """Insert (or replace) single sump record."""
     conn = get_connection()
     with conn.session as session:
-        query = text("""INSERT INTO sump (Tanggal, Site, Pit, Elevasi_Air, Critical_Elevation, Volume_Air_Survey, 
-                     Plan_Curah_Hujan, Curah_Hujan, Actual_Catchment, Groundwater, Status) 
-                     VALUES (:t, :s, :p, :ea, :ce, :vs, :rp, :ra, :ac, :gw, :st)""")
-        session.execute(query, {
-            "t": data['Tanggal'], "s": data['Site'], "p": data['Pit'],
-            "ea": data['Elevasi Air (m)'], "ce": data['Critical Elevation (m)'], "vs": data['Volume Air Survey (m3)'],
-            "rp": data['Plan Curah Hujan (mm)'], "ra": data['Curah Hujan (mm)'], "ac": data['Actual Catchment (Ha)'],
-            "gw": data['Groundwater (m3)'], "st": data['Status']
-        })
+        _upsert_frame(session, "sump", pd.DataFrame([data]))
+        _publish_change(session, _frame_pairs(pd.DataFrame([data])))
         session.commit()
 
 def save_new_pompa(data):
-    """Insert single pump record."""
+    """Insert (or replace) single pump record."""
     conn = get_connection()
     with conn.session as session:
-        query = text("""INSERT INTO pompa (Tanggal, Site, Pit, Unit_Code, Debit_Plan, Debit_Actual, EWH_Plan, EWH_Actual) 
-                     VALUES (:t, :s, :p, :uc, :dp, :da, :ep, :ea)""")
-        session.execute(query, {
-            "t": data['Tanggal'], "s": data['Site'], "p": data['Pit'],
-            "uc": data['Unit Code'], "dp": data['Debit Plan (m3/h)'], "da": data['Debit Actual (m3/h)'],
-            "ep": data['EWH Plan'], "ea": data['EWH Actual']
-        })
+        _upsert_frame(session, "pompa", pd.DataFrame([data]))
+        _refresh_pompa_cube(session, _cube_cells(pd.DataFrame([data])))
+        _publish_change(session, _frame_pairs(pd.DataFrame([data])))
         session.commit()
 
 def overwrite_full_db(df_s, df_p):
-    """Bulk replace tables."""
-    conn = get_connection()
-    s_save = df_s.rename(columns={
-        "Elevasi Air (m)": "elevasi_air", "Critical Elevation (m)": "critical_elevation",
-        "Volume Air Survey (m3)": "volume_air_survey", "Plan Curah Hujan (mm)": "plan_curah_hujan",
-        "Curah Hujan (mm)": "curah_hujan", "Actual Catchment (Ha)": "actual_catchment",
-        "Groundwater (m3)": "groundwater"
-    })
-    p_save = df_p.rename(columns={
-        "Unit Code": "unit_code", "Debit Plan (m3/h)": "debit_plan",
-        "Debit Actual (m3/h)": "debit_actual", "EWH Plan": "ewh_plan", "EWH Actual": "ewh_actual"
-    })
-    s_save.columns = map(str.lower, s_save.columns)
-    p_save.columns = map(str.lower, p_save.columns)
-
-    engine = conn.engine 
-    s_save.to_sql('sump', engine, if_exists='replace', index=False)
-    p_save.to_sql('pompa', engine, if_exists='replace', index=False)
-
-def generate_dummy_data():
-    """Generates dummy data matching the logic from app_previous.py."""
+    """Bulk replace table contents (schema and key indexes are kept)."""
+    conn = get_connection()
+    with conn.session as session:
+        pairs = _table_pairs(session, "1 = 1") | _frame_pairs(df_s) | _frame_pairs(df_p)
+        session.execute(text("DELETE FROM sump"))
+        session.execute(text("DELETE FROM pompa"))
+        _upsert_frame(session, "sump", df_s)
+        _upsert_frame(session, "pompa", df_p)
+        _rebuild_pompa_cube(session)
+        _publish_change(session, pairs)
+        session.commit()
+
+def _drop_key_duplicates(df, key):
+    """
+    One row per natural key. Neither database records write order (ctid/rowid are
+    storage positions, not timestamps), so the surviving row is an arbitrary pick,
+    made stable by sorting on every column. Rows with a null key column are all
+    kept: they never collide under the unique index.
+    """
+    null_key = df[key].isna().any(axis=1)
+    ordered = df[~null_key].sort_values(list(df.columns), na_position='first', kind='stable')
+    return pd.concat([ordered.drop_duplicates(subset=key, keep='last'), df[null_key]], ignore_index=True)
+
+def compact_duplicates():
+    """
+    One-off job: merges duplicate natural-key rows of the raw and archive tables
+    (see _drop_key_duplicates for which row is kept) and creates the unique key indexes.
+    Returns: (sump rows removed, pompa rows removed)
+    """
+    conn = get_connection()
+    frames = {}
+    for table in ("sump_archive", "sump", "pompa_archive", "pompa"):
+        columns, key = (SUMP_COLUMNS, SUMP_KEY) if table.startswith("sump") else (POMPA_COLUMNS, POMPA_KEY)
+        df = _prepare_frame(_query(conn, f"SELECT * FROM {table}"), columns)
+        frames[table] = (df, _drop_key_duplicates(df, key))
+    changed = {table: dedup for table, (df, dedup) in frames.items() if len(dedup) < len(df)}
+
+    with conn.session as session:
+        # Empty the tables first so the key indexes can be created before re-inserting
+        for table in changed:
+            session.execute(text(f"DELETE FROM {table}"))
+        for stmt in KEY_INDEXES.values():
+            session.execute(stmt)
+        # Archives first: a hot row is newer than an archived one with the same key
+        for table, dedup in changed.items():
+            _upsert_frame(session, table, dedup)
+        if "pompa" in changed or "pompa_archive" in changed:
+            _rebuild_pompa_cube(session)
+        if "sump_archive" in changed:
+            _rollup_sump(session, {_month_bounds(d) for d in changed["sump_archive"]['Tanggal'].dropna()})
+        _publish_change(session, set().union(*(_frame_pairs(dedup) for dedup in changed.values())))
+        session.commit()
+    blocked_key_indexes.clear()
+    # Pooled connections may still hold the pre-index schema
+    conn.engine.dispose()
+    removed = {table: len(df) - len(dedup) for table, (df, dedup) in frames.items()}
+    return removed["sump"] + removed["sump_archive"], removed["pompa"] + removed["pompa_archive"]
+
+# --- CHANGE NOTIFICATION ---
+# Every write bumps a global counter (the '*' row of data_version) and stamps the
+# (Site, Pit) pairs it touched with the new value, in the same transaction as the
+# write. Open sessions poll the counter and reload only pairs stamped after the
+# version they last saw. reset_db stamps the ('*', 'reset') row instead, which
+# makes sessions that saw an older version reload everything.
+
+DATA_VERSION_UPSERT = text("""INSERT INTO data_version (Site, Pit, Version) VALUES (:s, :p, :v)
+    ON CONFLICT (Site, Pit) DO UPDATE SET Version = excluded.Version""")
+
+def _frame_pairs(df):
+    """Distinct (Site, Pit) pairs of a dashboard-named frame."""
+    if df.empty:
+        return set()
+    return set(df[['Site', 'Pit']].dropna().drop_duplicates().itertuples(index=False, name=None))
+
+def _table_pairs(session, where, params=None):
+    """Distinct (Site, Pit) pairs of the sump and pompa rows matching where."""
+    rows = session.execute(text(f"""SELECT Site, Pit FROM sump WHERE {where}
+                                    UNION SELECT Site, Pit FROM pompa WHERE {where}"""), params or {})
+    return {tuple(r) for r in rows}
+
+def _bump_version(session):
+    """Increment the global counter and return the new version (within the caller's transaction)."""
+    # The counter row update also serialises concurrent writers until commit
+    session.execute(text("UPDATE data_version SET Version = Version + 1 WHERE Site = '*' AND Pit = '*'"))
+    return session.execute(text("SELECT Version FROM data_version WHERE Site = '*' AND Pit = '*'")).scalar()
+
+def _publish_change(session, pairs):
+    """Stamp the touched (Site, Pit) pairs with a new data version (within the caller's transaction)."""
+    if not pairs:
+        return
+    version = _bump_version(session)
+    session.execute(DATA_VERSION_UPSERT, [{"s": s, "p": p, "v": version} for s, p in pairs])
+
+def load_data_version():
+    """Current data version; a single-row read that sessions can poll cheaply."""
+    conn = get_connection()
+    try:
+        df = _query(conn, "SELECT Version FROM data_version WHERE Site = '*' AND Pit = '*'")
+    except Exception:
+        # Not created yet (first start): everything written from here on is newer
+        return 0
+    return int(df.iloc[0, 0]) if not df.empty else 0
+
+def load_changes(since):
+    """
+    Reload the session-window rows of every (Site, Pit) changed after version `since`.
+    Returns: (version, changed pairs, sump rows, pompa rows) of those pairs;
+    pairs is None when the database was reset since then and the rows are the full tables
+    """
+    conn = get_connection()
+    changed = _query(conn, """SELECT Site, Pit, Version FROM data_version
+                              WHERE Version > :v AND NOT (Site = '*' AND Pit = '*')""", params={"v": since})
+    version = max([since, *changed.iloc[:, 2].astype(int).tolist()])
+    pairs = list(changed.iloc[:, :2].itertuples(index=False, name=None))
+    if ("*", "reset") in pairs:
+        df_s, df_p = load_data()
+        return version, None, df_s, df_p
+    if not pairs:
+        return version, pairs, _prepare_frame(pd.DataFrame(), SUMP_COLUMNS), _prepare_frame(pd.DataFrame(), POMPA_COLUMNS)
+
+    where = " OR ".join(f"(Site = :s{i} AND Pit = :p{i})" for i in range(len(pairs)))
+    where = f"({where}) AND {SESSION_WINDOW}"
+    params = {k: v for i, (s, p) in enumerate(pairs) for k, v in ((f"s{i}", s), (f"p{i}", p))}
+    params["cutoff"] = retention_cutoff()
+    df_s = _query(conn, f"SELECT * FROM sump WHERE {where}", params=params)
+    df_p = _query(conn, f"SELECT * FROM pompa WHERE {where}", params=params)
+    return version, pairs, _prepare_frame(df_s, SUMP_COLUMNS), _prepare_frame(df_p, POMPA_COLUMNS)
+
+# --- PUMP PERFORMANCE CUBE ---
+# pompa_cube keeps additive monthly sums per unit, refreshed cell by cell in the
+# same transaction as the pompa write. Only the monthly grain is materialised:
+# a unit-day is already a single pompa row (unique on the natural key), and the
+# daily views (dashboard, overview) aggregate the session's in-memory frames
+# rather than querying pompa, so a daily cube table would have no reader.
+# It doubles as the monthly pump summary of archived months, so it reads both tables.
+
+POMPA_ALL = """(SELECT Tanggal, Site, Pit, Unit_Code, Debit_Plan, Debit_Actual, EWH_Plan, EWH_Actual FROM pompa
+               UNION ALL
+               SELECT Tanggal, Site, Pit, Unit_Code, Debit_Plan, Debit_Actual, EWH_Plan, EWH_Actual FROM pompa_archive) AS p"""
+
+CUBE_REFRESH = [
+    text("""DELETE FROM pompa_cube
+         WHERE Site = :s AND Pit = :p AND Unit_Code = :uc AND Tanggal = :m0"""),
+    text("""INSERT INTO pompa_cube (Tanggal, Site, Pit, Unit_Code, Hari, Debit_Plan_Sum, Debit_Actual_Sum,
+                                 EWH_Plan_Sum, EWH_Actual_Sum, Volume_Plan, Volume_Actual)
+         SELECT :m0, Site, Pit, Unit_Code, COUNT(*), SUM(Debit_Plan), SUM(Debit_Actual),
+                SUM(EWH_Plan), SUM(EWH_Actual), SUM(Debit_Plan * EWH_Plan), SUM(Debit_Actual * EWH_Actual)
+         FROM """ + POMPA_ALL + """
+         WHERE Site = :s AND Pit = :p AND Unit_Code = :uc AND Tanggal >= :m0 AND Tanggal < :m1
+         GROUP BY Site, Pit, Unit_Code"""),
+]
+
+def _month_bounds(d):
+    """(first day of month, first day of next month) for a date."""
+    m0 = pd.Timestamp(d).to_period('M').start_time
+    return m0.date(), (m0 + pd.offsets.MonthBegin(1)).date()
+
+def _cube_cells(df):
+    """Distinct (site, pit, unit, month) cube cells touched by a frame of pump rows."""
+    if df.empty:
+        return []
+    keys = df[['Site', 'Pit', 'Unit Code']].rename(columns={'Unit Code': 'Unit'})
+    keys['Bulan'] = pd.to_datetime(df['Tanggal']).dt.to_period('M').dt.start_time
+    cells = []
+    for row in keys.drop_duplicates().dropna().itertuples(index=False):
+        m0, m1 = _month_bounds(row.Bulan)
+        cells.append({"s": row.Site, "p": row.Pit, "uc": row.Unit, "m0": m0, "m1": m1})
+    return cells
+
+def _refresh_pompa_cube(session, cells):
+    """Recompute the given cube cells from pompa (within the caller's transaction)."""
+    if cells:
+        for stmt in CUBE_REFRESH:
+            session.execute(stmt, cells)
+
+def _rebuild_pompa_cube(session):
+    session.execute(text("DELETE FROM pompa_cube"))
+    keys = pd.DataFrame(
+        session.execute(text(f"SELECT DISTINCT Site, Pit, Unit_Code, Tanggal FROM {POMPA_ALL}")).fetchall(),
+        columns=['Site', 'Pit', 'Unit Code', 'Tanggal']
+    )
+    _refresh_pompa_cube(session, _cube_cells(keys))
+
+def _backfill_pompa_cube():
+    """Fills an empty cube from existing pump rows (first run after upgrade)."""
+    conn = get_connection()
+    with conn.session as session:
+        cube_empty = session.execute(text("SELECT 1 FROM pompa_cube LIMIT 1")).first() is None
+        if cube_empty and session.execute(text("SELECT 1 FROM pompa LIMIT 1")).first() is not None:
+            _rebuild_pompa_cube(session)
+            session.commit()
+
+def load_fleet_cube(year, month_int):
+    """Cube rows of every unit on every site for one month."""
+    conn = get_connection()
+    df = _query(conn, "SELECT * FROM pompa_cube WHERE Tanggal = :m0",
+                    params={"m0": date(year, month_int, 1)})
+    return _prepare_frame(df, CUBE_COLUMNS)
+
+# --- MONTHLY PARTITIONS & RETENTION ---
+# On Postgres, sump/pompa are range-partitioned by month on Tanggal. Retention
+# rolls closed months into sump_bulanan (pump months are already in pompa_cube)
+# and moves their raw rows to sump_archive/pompa_archive, so the hot tables only
+# hold recent months.
+
+RETENTION_MONTHS = 12
+ARCHIVE_KEYS = {"sump": ["Site", "Pit", "Tanggal"], "pompa": ["Site", "Pit", "Unit_Code", "Tanggal"]}
+
+def retention_cutoff(keep_months=RETENTION_MONTHS):
+    """First day of the oldest month that retention keeps in the hot tables."""
+    return (pd.Timestamp(date.today()).to_period('M') - keep_months).start_time.date()
+
+def _create_partitioned(session, name, columns):
+    """Create a month-partitioned table, converting an existing plain table in place."""
+    kind = session.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:t)"), {"t": name}).scalar()
+    if kind is None or kind == 'p':
+        if kind is None:
+            session.execute(text(f"CREATE TABLE {name} ({columns}) PARTITION BY RANGE (Tanggal)"))
+        # Rows without a Tanggal (e.g. from the old free-form editor) land here instead of failing
+        session.execute(text(f"CREATE TABLE IF NOT EXISTS {name}_default PARTITION OF {name} DEFAULT"))
+        return
+
+    # Plain table from an older version: swap in a partitioned one and copy every row over
+    fields = ", ".join(col.split()[0] for col in columns.split(","))
+    session.execute(text(f"ALTER TABLE {name} RENAME TO {name}_unpartitioned"))
+    session.execute(text(f"DROP INDEX IF EXISTS {name}_natural_key"))
+    session.execute(text(f"CREATE TABLE {name} ({columns}) PARTITION BY RANGE (Tanggal)"))
+    session.execute(text(f"CREATE TABLE {name}_default PARTITION OF {name} DEFAULT"))
+    months = session.execute(text(f"SELECT DISTINCT CAST(Tanggal AS DATE) FROM {name}_unpartitioned")).scalars().all()
+    _ensure_partitions(session, name, [m for m in months if m is not None])
+    session.execute(text(f"""INSERT INTO {name} ({fields})
+                         SELECT CAST(Tanggal AS DATE), {fields.split(", ", 1)[1]} FROM {name}_unpartitioned"""))
+    session.execute(text(f"DROP TABLE {name}_unpartitioned"))
+
+def _partition_name(table, m0):
+    return f"{table}_{m0:%Y_%m}"
+
+def _ensure_partitions(session, table, dates):
+    """
+    Create the month partitions that rows with these dates will land in (Postgres only).
+    Always asks the catalog: a cache would go stale on reset_db or a rolled-back transaction.
+    """
+    if not _is_postgres(session):
+        return
+    for m0, m1 in {_month_bounds(d) for d in dates if d is not None}:
+        session.execute(text(f"CREATE TABLE IF NOT EXISTS {_partition_name(table, m0)} PARTITION OF {table} "
+                             f"FOR VALUES FROM ('{m0}') TO ('{m1}')"))
+
+def _archive_month(session, table, m0, m1):
+    """Move one month of raw rows from table to table_archive."""
+    if _is_postgres(session):
+        part = _partition_name(table, m0)
+        archive_part = _partition_name(f"{table}_archive", m0)
+        attached = session.execute(text("""
+            SELECT 1 FROM pg_inherits
+            WHERE inhrelid = to_regclass(:part) AND inhparent = to_regclass(:parent)"""),
+            {"part": part, "parent": table}).first()
+        archive_exists = session.execute(text("SELECT to_regclass(:t)"), {"t": archive_part}).scalar()
+        if attached and not archive_exists:
+            # Metadata-only move: detach the month partition and attach it to the archive
+            session.execute(text(f"ALTER TABLE {table} DETACH PARTITION {part}"))
+            session.execute(text(f"ALTER TABLE {part} RENAME TO {archive_part}"))
+            session.execute(text(f"ALTER TABLE {table}_archive ATTACH PARTITION {archive_part} "
+                                 f"FOR VALUES FROM ('{m0}') TO ('{m1}')"))
+            return
+        _ensure_partitions(session, f"{table}_archive", [m0])
+
+    # Row copy; on a key already in the archive the hot row wins, as it is the newer write
+    fields = [col.split()[0] for col in RAW_TABLES[table].split(",")]
+    key = ARCHIVE_KEYS[table]
+    updates = ", ".join(f"{f} = excluded.{f}" for f in fields if f not in key)
+    window = {"m0": m0, "m1": m1}
+    session.execute(text(f"""INSERT INTO {table}_archive ({", ".join(fields)})
+                         SELECT {", ".join(fields)} FROM {table} WHERE Tanggal >= :m0 AND Tanggal < :m1
+                         ON CONFLICT ({", ".join(key)}) DO UPDATE SET {updates}"""), window)
+    session.execute(text(f"DELETE FROM {table} WHERE Tanggal >= :m0 AND Tanggal < :m1"), window)
+
+def _archived_months(session, dates):
+    """The (m0, m1) months among these dates that retention has already moved to the archive."""
+    archived = set()
+    for m0, m1 in {_month_bounds(d) for d in dates if d is not None}:
+        window = {"m0": m0, "m1": m1}
+        if any(session.execute(text(f"SELECT 1 FROM {table}_archive WHERE Tanggal >= :m0 AND Tanggal < :m1 LIMIT 1"),
+                               window).first() for table in RAW_TABLES):
+            archived.add((m0, m1))
+    return archived
+
+SUMP_ALL = """(SELECT Tanggal, Site, Pit, Elevasi_Air, Critical_Elevation, Volume_Air_Survey, Plan_Curah_Hujan,
+                      Curah_Hujan, Groundwater, Status FROM sump
+              UNION ALL
+              SELECT Tanggal, Site, Pit, Elevasi_Air, Critical_Elevation, Volume_Air_Survey, Plan_Curah_Hujan,
+                     Curah_Hujan, Groundwater, Status FROM sump_archive) AS s"""
+
+# Recomputes the summaries of every pit with rows in the month, from hot and archived rows
+# alike; pits without rows in the month keep their summary
+SUMP_ROLLUP = text("""
+    INSERT INTO sump_bulanan (Tanggal, Site, Pit, Hari, Hari_Bahaya, Elevasi_Min, Elevasi_Max, Elevasi_Avg,
+                              Critical_Elevation, Volume_Air_Survey_Avg, Plan_Curah_Hujan_Sum,
+                              Curah_Hujan_Sum, Groundwater_Sum)
+    SELECT :m0, Site, Pit, COUNT(*), SUM(CASE WHEN Status = 'BAHAYA' THEN 1 ELSE 0 END),
+           MIN(Elevasi_Air), MAX(Elevasi_Air), AVG(Elevasi_Air), MAX(Critical_Elevation),
+           AVG(Volume_Air_Survey), SUM(Plan_Curah_Hujan), SUM(Curah_Hujan), SUM(Groundwater)
+    FROM """ + SUMP_ALL + """
+    WHERE Tanggal >= :m0 AND Tanggal < :m1
+    GROUP BY Site, Pit
+    ON CONFLICT (Site, Pit, Tanggal) DO UPDATE SET
+    Hari = excluded.Hari, Hari_Bahaya = excluded.Hari_Bahaya, Elevasi_Min = excluded.Elevasi_Min,
+    Elevasi_Max = excluded.Elevasi_Max, Elevasi_Avg = excluded.Elevasi_Avg,
+    Critical_Elevation = excluded.Critical_Elevation, Volume_Air_Survey_Avg = excluded.Volume_Air_Survey_Avg,
+    Plan_Curah_Hujan_Sum = excluded.Plan_Curah_Hujan_Sum, Curah_Hujan_Sum = excluded.Curah_Hujan_Sum,
+    Groundwater_Sum = excluded.Groundwater_Sum""")
+
+def _rollup_sump(session, months):
+    """Recompute sump_bulanan for the given (m0, m1) months (within the caller's transaction)."""
+    for m0, m1 in sorted(months):
+        session.execute(SUMP_ROLLUP, {"m0": m0, "m1": m1})
+
+def apply_retention(keep_months=RETENTION_MONTHS):
+    """
+    Retention job: closed months older than keep_months are rolled up into
+    sump_bulanan and their raw sump/pompa rows moved to the archive tables.
+    Returns: list of archived months (first day of each month)
+    """
+    cutoff = retention_cutoff(keep_months)
+    conn = get_connection()
+    with conn.session as session:
+        dates = []
+        for table in RAW_TABLES:
+            dates += session.execute(text(f"SELECT DISTINCT Tanggal FROM {table} WHERE Tanggal < :cutoff"),
+                                     {"cutoff": cutoff}).scalars().all()
+        months = sorted({_month_bounds(d) for d in dates if d is not None})
+        pairs = _table_pairs(session, "Tanggal < :cutoff", {"cutoff": cutoff}) if months else set()
+        moved_pumps = pd.DataFrame(session.execute(text(
+            "SELECT DISTINCT Site, Pit, Unit_Code, Tanggal FROM pompa WHERE Tanggal < :cutoff"), {"cutoff": cutoff}).fetchall(),
+            columns=['Site', 'Pit', 'Unit Code', 'Tanggal'])
+        for m0, m1 in months:
+            for table in RAW_TABLES:
+                _archive_month(session, table, m0, m1)
+        # After the move, so a late row replacing an archived one is not counted twice
+        _rollup_sump(session, months)
+        _refresh_pompa_cube(session, _cube_cells(moved_pumps))
+        _publish_change(session, pairs)
+        session.commit()
+    return [m0 for m0, _ in months]
+
+SUMMARY_COLUMNS = {
+    "tanggal": "Bulan", "site": "Site", "pit": "Pit", "hari": "Hari", "hari_bahaya": "Hari Bahaya",
+    "elevasi_min": "Elevasi Min (m)", "elevasi_max": "Elevasi Max (m)", "elevasi_avg": "Elevasi Avg (m)",
+    "critical_elevation": "Critical Elevation (m)", "volume_air_survey_avg": "Volume Survey Avg (m3)",
+    "plan_curah_hujan_sum": "Plan Curah Hujan (mm)", "curah_hujan_sum": "Curah Hujan (mm)",
+    "groundwater_sum": "Groundwater (m3)"
+}
+
+def load_sump_summary(site, year, month_int):
+    """Monthly summary rows of an archived month for one site."""
+    conn = get_connection()
+    df = _query(conn, "SELECT * FROM sump_bulanan WHERE Site = :s AND Tanggal = :m0",
+                    params={"s": site, "m0": date(year, month_int, 1)})
+    return _prepare_frame(df, SUMMARY_COLUMNS)
+
+def load_summary_years():
+    """Years with data outside the session window: monthly summaries and older hot rows."""
+    conn = get_connection()
+    df = _query(conn, "SELECT DISTINCT Tanggal FROM sump_bulanan UNION SELECT DISTINCT Tanggal FROM sump WHERE Tanggal < :cutoff",
+                params={"cutoff": retention_cutoff()})
+    return sorted(pd.to_datetime(df.iloc[:, 0]).dt.year.unique().tolist()) if not df.empty else []
+
+def generate_dummy_data(days=30, pits=None, units=2):
+    """
+    Generates dummy data matching the logic from app_previous.py.
+    days x pits x units sizes the data set (used by loadtest.py); pits=None keeps
+    the five sumps of the previous app.
+    """
     conn = get_connection()
     
     # 1. Config based on PREVIOUS APP logic
@@ -152,14 +718,20 @@ def generate_dummy_data():
         f"{dummy_prefix}Nusantara Energy (NE)": [f"{dummy_prefix}Sump S8"]
     }
     
-    units = [f"{dummy_prefix}WP-01", f"{dummy_prefix}WP-02"]
+    if pits:
+        # Spread numbered sumps over the same sites
+        sites = list(init_map)
+        init_map = {site: [f"{dummy_prefix}Sump {n:03d}" for n in range(k + 1, pits + 1, len(sites))]
+                    for k, site in enumerate(sites)}
     
-    # 2. Generate Data Loop (30 Days)
+    units = [f"{dummy_prefix}WP-{n:02d}" for n in range(1, units + 1)]
+    
+    # 2. Generate Data Loop (30 Days by default)
     today = date.today()
     sump_rows = []
     pump_rows = []
     
-    for i in range(30):
+    for i in range(days):
         d = today - timedelta(days=i)
         
         for site, pits in init_map.items():
@@ -195,18 +767,27 @@ def generate_dummy_data():
                         "ewh_actual": round(np.random.uniform(15, 20), 1)
                     })
         
-    # 3. Save to DB
-    df_s_dummy = pd.DataFrame(sump_rows)
-    df_p_dummy = pd.DataFrame(pump_rows)
+    # 3. Save to DB (upsert, so re-generating refreshes the same days)
+    df_s_dummy = pd.DataFrame(sump_rows).rename(columns=SUMP_COLUMNS)
+    df_p_dummy = pd.DataFrame(pump_rows).rename(columns=POMPA_COLUMNS)
     
-    engine = conn.engine
-    df_s_dummy.to_sql('sump', engine, if_exists='append', index=False)
-    df_p_dummy.to_sql('pompa', engine, if_exists='append', index=False)
+    with conn.session as session:
+        _upsert_frame(session, "sump", df_s_dummy)
+        _upsert_frame(session, "pompa", df_p_dummy)
+        _refresh_pompa_cube(session, _cube_cells(df_p_dummy))
+        _publish_change(session, _frame_pairs(df_s_dummy) | _frame_pairs(df_p_dummy))
+        session.commit()
 
 def delete_dummy_data():
     """Deletes all data where Site starts with 'dummy_'."""
     conn = get_connection()
     with conn.session as session:
+        pairs = _table_pairs(session, "Site LIKE 'dummy_%'")
         session.execute(text("DELETE FROM sump WHERE Site LIKE 'dummy_%'"))
         session.execute(text("DELETE FROM pompa WHERE Site LIKE 'dummy_%'"))
+        session.execute(text("DELETE FROM sump_archive WHERE Site LIKE 'dummy_%'"))
+        session.execute(text("DELETE FROM pompa_archive WHERE Site LIKE 'dummy_%'"))
+        session.execute(text("DELETE FROM pompa_cube WHERE Site LIKE 'dummy_%'"))
+        session.execute(text("DELETE FROM sump_bulanan WHERE Site LIKE 'dummy_%'"))
+        _publish_change(session, pairs)
         session.commit()
\ No newline at end of file
@@ -0,0 +1,252 @@
+"""
+Concurrent-session load test for app.py, built on Streamlit's AppTest.
+
+Runs N simulated engineers in parallel against a local database (SQLite file by
+default, or a Postgres URL), each clicking through the sidebar filters, the
+input forms and the bulk editor. Reports p50/p95 rerun latency, DB queries per
+rerun and memory per session, and exits with status 1 when a budget is exceeded.
+
+The database is seeded with dummy data (--days x --pits x --units) and sessions
+only write to dummy_ sites; all dummy data is deleted afterwards. A --db-url
+that already holds dummy data is refused, since the cleanup would remove it.
+
+    python loadtest.py --sessions 10 --rounds 5
+    python loadtest.py --days 365 --pits 40 --units 4
+    python loadtest.py --db-url postgresql://user:pw@localhost/sump --p95-ms 1500
+
+Note: AppTest always reruns the whole script, so latencies are an upper bound
+for interactions that only rerun a fragment in a real browser session.
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+# DB statements executed by any engine in this process
+_query_count = 0
+_query_lock = threading.Lock()
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    global _query_count
+    with _query_lock:
+        _query_count += 1
+
+def _queries():
+    with _query_lock:
+        return _query_count
+
+def _rss_mb():
+    """Current resident set size of this process (MB)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        # Peak RSS; kB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (2**20 if sys.platform == "darwin" else 2**10)
+
+def _state_mb(at):
+    """Deep size of the DataFrames a session keeps in st.session_state (MB)."""
+    def size(v):
+        if isinstance(v, pd.DataFrame):
+            return int(v.memory_usage(deep=True).sum())
+        if isinstance(v, (tuple, list)):
+            return sum(size(x) for x in v)
+        return 0
+    return sum(size(v) for _, v in at.session_state.items()) / 2**20
+
+DUMMY_PREFIX = "dummy_"
+
+def _setup_db(db_url, workdir, days, pits, units):
+    """
+    Point st.connection("neon") at db_url and seed it with dummy data.
+    Returns: the database module, or None when the database already holds dummy data
+    """
+    os.makedirs(os.path.join(workdir, ".streamlit"), exist_ok=True)
+    with open(os.path.join(workdir, ".streamlit", "secrets.toml"), "w") as f:
+        f.write(f'[connections.neon]\nurl = "{db_url}"\n')
+    os.chdir(workdir)
+    sys.path.insert(0, os.path.dirname(APP_PATH))
+    import database as db
+    df_s, df_p = db.load_data()
+    if df_s['Site'].str.startswith(DUMMY_PREFIX).any() or df_p['Site'].str.startswith(DUMMY_PREFIX).any():
+        return None
+    db.generate_dummy_data(days=days, pits=pits, units=units)
+    return db
+
+class Session:
+    """One simulated engineer; script() yields after every rerun so sessions can be interleaved."""
+
+    def __init__(self, idx, timeout):
+        from streamlit.testing.v1 import AppTest
+        self.idx = idx
+        self.at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        self.latencies = []
+        self.rng = np.random.default_rng(idx)
+
+    def _run(self, action):
+        start = time.perf_counter()
+        action()
+        self.latencies.append((time.perf_counter() - start) * 1000)
+        if self.at.exception:
+            raise RuntimeError(f"session {self.idx}: {self.at.exception[0].message}")
+
+    def _pick(self, options):
+        return options[int(self.rng.integers(len(options)))]
+
+    def _by_label(self, widgets, label):
+        return next(w for w in widgets if w.label == label)
+
+    def _select(self, idx, options=None):
+        box = self.at.sidebar.selectbox[idx]
+        self._run(lambda: box.set_value(self._pick(options or box.options)).run())
+
+    def _select_site(self):
+        # Forms and the bulk editor write to the selected site: never pick a real one
+        self._select(0, [s for s in self.at.sidebar.selectbox[0].options if s.startswith(DUMMY_PREFIX)])
+
+    def script(self, rounds):
+        self._run(self.at.run)
+        yield
+        # Log in directly; the login form itself is not under test
+        self.at.session_state['logged_in'] = True
+        self.at.session_state['username'] = f"load{self.idx}"
+        self._run(self.at.run)
+        yield
+
+        for _ in range(rounds):
+            # Sidebar filters: site, sump, unit, month
+            self._select_site()
+            yield
+            for idx in (1, 2):
+                self._select(idx)
+                yield
+            self._select(4, self.at.sidebar.selectbox[4].options[:date.today().month])
+            yield
+
+            # Input forms
+            if self.at.radio:
+                self._run(lambda: self.at.radio[0].set_value("Pilih Sump Ada").run())
+                yield
+            nums = self.at.number_input
+            self._by_label(nums, "Elevasi (m)").set_value(round(float(self.rng.uniform(8, 12)), 2))
+            self._by_label(nums, "Rain Act (mm)").set_value(float(self.rng.integers(0, 40)))
+            self._run(lambda: self._by_label(self.at.button, "Simpan Sump").click().run())
+            yield
+            self._by_label(self.at.text_input, "Unit Code (e.g., WP-01)").set_value(f"{DUMMY_PREFIX}load_WP-{self.idx:02d}")
+            self._by_label(self.at.number_input, "Debit Actual (m3/h)").set_value(int(self.rng.integers(300, 500)))
+            self._by_label(self.at.number_input, "EWH Actual (Jam)").set_value(float(self.rng.uniform(10, 20)))
+            self._run(lambda: self._by_label(self.at.button, "Simpan Pompa").click().run())
+            yield
+
+            # Bulk editor: next page, then commit the sump page
+            page = self.at.number_input(key="edit_page_no_pompa")
+            self._run(lambda: page.set_value(min(page.max, page.value + 1)).run())
+            yield
+            self._run(lambda: self._by_label(self.at.button, "💾 UPDATE SUMP DB").click().run())
+            yield
+
+def _worker(workdir, session_ids, rounds, timeout):
+    """
+    Runs a group of sessions in this process. AppTest keeps one global runtime
+    per process, so reruns are interleaved round-robin rather than threaded.
+    Returns: (latencies, queries, rss growth MB, session_state MB per session)
+    """
+    os.chdir(workdir)
+    sys.path.insert(0, os.path.dirname(APP_PATH))
+    # Warm-up run so one-off imports are not billed to the sessions
+    Session(0, timeout).at.run()
+    rss_before = _rss_mb()
+    queries_before = _queries()
+
+    sessions = [Session(i, timeout) for i in session_ids]
+    pending = [s.script(rounds) for s in sessions]
+    while pending:
+        for script in list(pending):
+            try:
+                next(script)
+            except StopIteration:
+                pending.remove(script)
+
+    latencies = [ms for s in sessions for ms in s.latencies]
+    return (latencies, _queries() - queries_before, max(_rss_mb() - rss_before, 0),
+            [_state_mb(s.at) for s in sessions])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=5, help="concurrent sessions (default 5)")
+    parser.add_argument("--rounds", type=int, default=3, help="click-through rounds per session (default 3)")
+    parser.add_argument("--processes", type=int, help="worker processes running sessions in parallel (default: CPU count)")
+    parser.add_argument("--db-url", help="SQLAlchemy URL (default: temporary SQLite file)")
+    parser.add_argument("--days", type=int, default=30, help="days of seeded data (default 30)")
+    parser.add_argument("--pits", type=int, help="seeded sumps (default: the 5 sumps of generate_dummy_data)")
+    parser.add_argument("--units", type=int, default=2, help="pump units per sump (default 2)")
+    parser.add_argument("--timeout", type=float, default=120, help="AppTest timeout per rerun in seconds")
+    parser.add_argument("--p95-ms", type=float, default=2000, help="budget: p95 rerun latency (ms)")
+    parser.add_argument("--queries-per-rerun", type=float, default=25, help="budget: mean DB queries per rerun")
+    parser.add_argument("--mb-per-session", type=float, default=64, help="budget: resident memory per session (MB)")
+    args = parser.parse_args(argv)
+
+    cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="sump-loadtest-")
+    db_url = args.db_url or f"sqlite:///{os.path.join(workdir, 'loadtest.db')}"
+    processes = max(1, min(args.processes or os.cpu_count() or 1, args.sessions))
+    groups = [list(range(args.sessions))[i::processes] for i in range(processes)]
+    db = None
+    try:
+        db = _setup_db(db_url, workdir, args.days, args.pits, args.units)
+        if db is None:
+            print(f"ERROR: {db_url} already holds {DUMMY_PREFIX} data, which the cleanup would delete")
+            return 2
+        with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn")) as pool:
+            results = list(pool.map(_worker, [workdir] * processes, groups,
+                                    [args.rounds] * processes, [args.timeout] * processes))
+    finally:
+        if db is not None:
+            db.delete_dummy_data()
+            db.get_connection().engine.dispose()
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    latencies = np.array([ms for r in results for ms in r[0]])
+    queries_per_rerun = sum(r[1] for r in results) / len(latencies)
+    rss_per_session = max(r[2] / len(g) for r, g in zip(results, groups))
+    state_per_session = np.mean([mb for r in results for mb in r[3]])
+    p50, p95 = np.percentile(latencies, [50, 95])
+
+    print(f"sessions={args.sessions} processes={processes} rounds={args.rounds} reruns={len(latencies)} db={db_url}")
+    print(f"data              days={args.days} pits={args.pits or 'default'} units={args.units}")
+    print(f"rerun latency     p50={p50:.0f} ms  p95={p95:.0f} ms  (budget p95 {args.p95_ms:.0f} ms)")
+    print(f"db queries/rerun  {queries_per_rerun:.1f}  (budget {args.queries_per_rerun:.1f})")
+    print(f"memory/session    rss={rss_per_session:.1f} MB  session_state={state_per_session:.1f} MB  (budget {args.mb_per_session:.1f} MB)")
+
+    failures = []
+    if p95 > args.p95_ms:
+        failures.append("p95 latency")
+    if queries_per_rerun > args.queries_per_rerun:
+        failures.append("queries per rerun")
+    if rss_per_session > args.mb_per_session:
+        failures.append("memory per session")
+    if failures:
+        print("FAIL: over budget: " + ", ".join(failures))
+        return 1
+    print("OK")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -35,8 +35,11 @@ def process_water_balance(df_s, df_p, selected_site, selected_pit, selected_unit
             df_p_display = df_p_filt[df_p_filt['Unit Code'] == selected_unit].sort_values(by="Tanggal")
             title_suffix = f"Unit: {selected_unit}"
         else:
-            df_p_display = df_p_filt.groupby('Tanggal')[['Debit Plan (m3/h)', 'Debit Actual (m3/h)', 'EWH Plan', 'EWH Actual']].mean().reset_index()
-            title_suffix = "Rata-rata Semua Unit"
+            # Debit is summed (units have different capacities), EWH is averaged
+            df_p_display = df_p_filt.groupby('Tanggal').agg({
+                'Debit Plan (m3/h)': 'sum', 'Debit Actual (m3/h)': 'sum', 'EWH Plan': 'mean', 'EWH Actual': 'mean'
+            }).reset_index()
+            title_suffix = "Total Debit & Rata-rata EWH Semua Unit"
 
     # 4. Water Balance Calculation
     if not df_s_filt.empty:
@@ -63,4 +66,113 @@ def process_water_balance(df_s, df_p, selected_site, selected_pit, selected_unit
         df_wb['Error %'] = (df_wb['Diff Volume'].abs() / df_wb['Volume Air Survey (m3)']) * 100
         df_wb_dash = df_wb
 
-    return df_wb_dash, df_p_display, title_suffix
\ No newline at end of file
+    return df_wb_dash, df_p_display, title_suffix
+
+
+def site_overview(df_s, df_p, site, year, month_int):
+    """
+    Water balance of every pit of a site for one month in a single grouped pass
+    (instead of one process_water_balance call per pit).
+    Returns: df_daily (one row per pit per day), df_pits (one row per pit, with trend lists)
+    """
+    if df_s.empty or not site:
+        return pd.DataFrame(), pd.DataFrame()
+    in_month = lambda df: (df['Site'] == site) & (df['Tanggal'].dt.year == year) & (df['Tanggal'].dt.month == month_int)
+    df = df_s[in_month(df_s)].sort_values(by=['Pit', 'Tanggal'])
+    if df.empty:
+        return pd.DataFrame(), pd.DataFrame()
+
+    if not df_p.empty:
+        df_out = df_p[in_month(df_p)]
+        daily_out = (df_out['Debit Actual (m3/h)'] * df_out['EWH Actual']).groupby([df_out['Pit'], df_out['Tanggal']]).sum()
+        df = df.merge(daily_out.rename('Volume Out').reset_index(), on=['Pit', 'Tanggal'], how='left')
+        df['Volume Out'] = df['Volume Out'].fillna(0)
+    else:
+        df['Volume Out'] = 0
+
+    # Same balance equation as process_water_balance, with yesterday taken per pit
+    vol_in = df['Curah Hujan (mm)'] * df['Actual Catchment (Ha)'] * 10 + df['Groundwater (m3)'].fillna(0)
+    df['Volume Teoritis'] = df.groupby('Pit')['Volume Air Survey (m3)'].shift(1) + vol_in - df['Volume Out']
+    df['Error %'] = ((df['Volume Air Survey (m3)'] - df['Volume Teoritis']).abs() / df['Volume Air Survey (m3)']) * 100
+
+    df_pits = df.groupby('Pit', sort=True).agg(**{
+        'Tanggal': ('Tanggal', 'last'),
+        'Elevasi (m)': ('Elevasi Air (m)', 'last'),
+        'Critical (m)': ('Critical Elevation (m)', 'last'),
+        'Rain MTD (mm)': ('Curah Hujan (mm)', 'sum'),
+        'Pumped MTD (m3)': ('Volume Out', 'sum'),
+        'Error % Terakhir': ('Error %', 'last'),
+        'Elevasi Trend': ('Elevasi Air (m)', list),
+        'Pumped Trend': ('Volume Out', list),
+        'Error % Trend': ('Error %', lambda s: s.fillna(0).round(1).tolist()),
+    }).reset_index()
+    df_pits.insert(4, 'Margin (m)', df_pits['Critical (m)'] - df_pits['Elevasi (m)'])
+    df_pits.insert(1, 'Status', df_pits['Margin (m)'].lt(0).map({True: 'BAHAYA', False: 'AMAN'}))
+    return df, df_pits
+
+
+def apply_page_edit(df_all, df_original, df_edited, keys):
+    """
+    Applies a committed editor page to the in-memory table: rows whose key was
+    on the original page are replaced by the edited rows.
+    Returns: updated copy of df_all
+    """
+    if df_original.empty:
+        kept = df_all
+    else:
+        page_keys = pd.MultiIndex.from_frame(df_original[keys])
+        kept = df_all[~pd.MultiIndex.from_frame(df_all[keys]).isin(page_keys)]
+    return _concat_rows(kept, df_edited)
+
+
+def _concat_rows(df_kept, df_new):
+    """Concat that skips empty frames, so an untyped empty frame cannot change column dtypes."""
+    frames = [df for df in (df_kept, df_new) if not df.empty]
+    if not frames:
+        return df_kept.iloc[0:0].reset_index(drop=True)
+    return pd.concat(frames, ignore_index=True)
+
+
+def site_pit_pairs(df):
+    """Distinct (Site, Pit) pairs present in a table."""
+    if df.empty:
+        return []
+    return list(df[['Site', 'Pit']].drop_duplicates().itertuples(index=False, name=None))
+
+
+def apply_site_pit_delta(df_all, df_changed, pairs):
+    """
+    Applies a change-feed delta (see database.load_changes) to the in-memory
+    table: all rows of the changed (Site, Pit) pairs are replaced by df_changed.
+    Returns: updated copy of df_all
+    """
+    if not pairs:
+        return df_all
+    if df_all.empty:
+        return df_changed.reset_index(drop=True)
+    changed = pd.MultiIndex.from_tuples(pairs, names=['Site', 'Pit'])
+    kept = df_all[~pd.MultiIndex.from_frame(df_all[['Site', 'Pit']]).isin(changed)]
+    return _concat_rows(kept, df_changed)
+
+
+def fleet_performance(df_cube):
+    """
+    Ranks every pump unit from monthly cube rows (see database.load_fleet_cube).
+    Returns: one row per unit with achievement ratios, best unit first
+    """
+    if df_cube.empty:
+        return pd.DataFrame()
+
+    def pct(actual, plan):
+        return df[actual] / df[plan].where(df[plan] != 0) * 100
+
+    df = df_cube.copy()
+    df['Debit Achievement %'] = pct('Debit Actual Sum', 'Debit Plan Sum')
+    df['EWH Utilization %'] = pct('EWH Actual Sum', 'EWH Plan Sum')
+    df['Volume Achievement %'] = pct('Volume Actual (m3)', 'Volume Plan (m3)')
+    df['Debit Avg (m3/h)'] = df['Debit Actual Sum'] / df['Hari']
+
+    df = df.sort_values(by=['Volume Achievement %', 'Volume Actual (m3)'], ascending=False, na_position='last')
+    df.insert(0, 'Rank', range(1, len(df) + 1))
+    return df[['Rank', 'Site', 'Pit', 'Unit Code', 'Hari', 'Debit Avg (m3/h)', 'Debit Achievement %',
+               'EWH Utilization %', 'Volume Actual (m3)', 'Volume Plan (m3)', 'Volume Achievement %']].reset_index(drop=True)
@@ -0,0 +1,35 @@
+import pandas as pd
+
+import database as db
+
+
+def _sump(rows):
+    return db.normalize_types(pd.DataFrame(rows, columns=list(db.SUMP_COLUMNS.values())))
+
+
+def test_compaction_keeps_rows_with_null_key():
+    df = _sump([
+        [None, "S", "P", 1.0, 13.0, 100.0, 1.0, 1.0, 1.0, 0.0, "AMAN"],
+        [None, "S", "P", 2.0, 13.0, 100.0, 1.0, 1.0, 1.0, 0.0, "AMAN"],
+        ["2025-01-01", "S", "P", 3.0, 13.0, 100.0, 1.0, 1.0, 1.0, 0.0, "AMAN"],
+        ["2025-01-01", "S", "P", 4.0, 13.0, 100.0, 1.0, 1.0, 1.0, 0.0, "AMAN"],
+    ])
+
+    out = db._drop_key_duplicates(df, db.SUMP_KEY)
+
+    assert len(out) == 3
+    assert out["Tanggal"].isna().sum() == 2
+
+
+def test_compaction_pick_does_not_depend_on_row_order():
+    df = _sump([
+        ["2025-01-01", "S", "P", 3.0, 13.0, 100.0, 1.0, 1.0, 1.0, 0.0, "AMAN"],
+        ["2025-01-01", "S", "P", 4.0, 13.0, 100.0, 1.0, 1.0, 1.0, 0.0, "BAHAYA"],
+        ["2025-01-02", "S", "P", 5.0, 13.0, 100.0, 1.0, 1.0, 1.0, 0.0, None],
+    ])
+
+    out = db._drop_key_duplicates(df, db.SUMP_KEY)
+    out_reversed = db._drop_key_duplicates(df.iloc[::-1].reset_index(drop=True), db.SUMP_KEY)
+
+    assert len(out) == 2
+    pd.testing.assert_frame_equal(out, out_reversed)
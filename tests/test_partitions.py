@@ -0,0 +1,90 @@
+"""
+Postgres-only paths: in-place conversion to monthly partitions, the DEFAULT
+partition, retention by detach/attach and partition pruning of the session load.
+Runs against a scratch database given by SUMP_TEST_PG_URL (all tables are dropped).
+"""
+import os
+from datetime import date
+
+import pandas as pd
+import pytest
+import streamlit as st
+from sqlalchemy import text
+
+import database as db
+
+PG_URL = os.environ.get("SUMP_TEST_PG_URL")
+pytestmark = pytest.mark.skipif(not PG_URL, reason="SUMP_TEST_PG_URL not set")
+
+TABLES = ["sump", "pompa", "pompa_cube", "sump_bulanan", "sump_archive", "pompa_archive", "data_version"]
+
+
+@pytest.fixture
+def conn(monkeypatch):
+    monkeypatch.setattr(db, "get_connection", lambda: st.connection("pg_test", type="sql", url=PG_URL))
+    conn = db.get_connection()
+    with conn.session as session:
+        for table in TABLES:
+            session.execute(text(f"DROP TABLE IF EXISTS {table} CASCADE"))
+        session.commit()
+    yield conn
+    conn.engine.dispose()
+
+
+def _scalar(conn, sql, params=None):
+    with conn.engine.connect() as c:
+        return c.execute(text(sql), params or {}).scalar()
+
+
+def _sump_row(day, site="S", pit="P"):
+    return {"Tanggal": pd.Timestamp(day), "Site": site, "Pit": pit, "Elevasi Air (m)": 10.0,
+            "Critical Elevation (m)": 13.0, "Volume Air Survey (m3)": 1000.0, "Plan Curah Hujan (mm)": 1.0,
+            "Curah Hujan (mm)": 1.0, "Actual Catchment (Ha)": 1.0, "Groundwater (m3)": 0.0, "Status": "AMAN"}
+
+
+def test_plain_table_is_converted_in_place(conn):
+    with conn.session as session:
+        session.execute(text(f"CREATE TABLE sump ({db.SUMP_DDL})"))
+        session.execute(text(f"CREATE TABLE pompa ({db.POMPA_DDL})"))
+        session.execute(text("INSERT INTO sump (Tanggal, Site, Pit, Elevasi_Air) "
+                             "VALUES (:d, 'S', 'P', 1), (NULL, 'S', 'P', 2)"), {"d": date.today()})
+        session.commit()
+
+    df_s, _ = db.load_data()
+
+    assert _scalar(conn, "SELECT relkind FROM pg_class WHERE oid = 'sump'::regclass") == "p"
+    assert _scalar(conn, "SELECT COUNT(*) FROM sump_default") == 1
+    assert len(df_s) == 2 and df_s["Tanggal"].isna().sum() == 1
+
+
+def test_retention_moves_partition_to_archive(conn):
+    db.init_db()
+    old = (pd.Timestamp(date.today()) - pd.DateOffset(months=db.RETENTION_MONTHS + 2)).date()
+    db.save_new_sump(_sump_row(old))
+    db.save_new_sump(_sump_row(date.today()))
+    part = db._partition_name("sump", db._month_bounds(old)[0])
+
+    archived = db.apply_retention()
+
+    assert archived == [db._month_bounds(old)[0]]
+    assert _scalar(conn, "SELECT inhparent::regclass::text FROM pg_inherits WHERE inhrelid = to_regclass(:p)",
+                   {"p": db._partition_name("sump_archive", db._month_bounds(old)[0])}) == "sump_archive"
+    assert _scalar(conn, "SELECT to_regclass(:p)", {"p": part}) is None
+    assert _scalar(conn, "SELECT Hari FROM sump_bulanan WHERE Site = 'S'") == 1
+    df_s, _ = db.load_data()
+    assert df_s["Tanggal"].min().date() == date.today()
+
+
+def test_session_load_prunes_older_partitions(conn):
+    db.init_db()
+    old = (pd.Timestamp(date.today()) - pd.DateOffset(months=db.RETENTION_MONTHS + 2)).date()
+    db.save_new_sump(_sump_row(old))
+    db.save_new_sump(_sump_row(date.today()))
+
+    with conn.engine.connect() as c:
+        plan = "\n".join(c.execute(text(f"EXPLAIN SELECT * FROM sump WHERE {db.SESSION_WINDOW}"),
+                                   {"cutoff": db.retention_cutoff()}).scalars())
+
+    assert db._partition_name("sump", db._month_bounds(date.today())[0]) in plan
+    assert db._partition_name("sump", db._month_bounds(old)[0]) not in plan
+    assert "sump_default" in plan
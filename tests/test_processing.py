@@ -0,0 +1,59 @@
+import pandas as pd
+
+import database as db
+import processing as proc
+
+
+def _sump(rows):
+    return db.normalize_types(pd.DataFrame(rows, columns=list(db.SUMP_COLUMNS.values())))
+
+
+def test_delta_for_deleted_pair_keeps_dtypes():
+    df_all = _sump([
+        ["2025-01-01", "dummy_A", "P1", 10.0, 20.0, 100.0, 5.0, 4.0, 1.0, 0.0, "Aman"],
+        ["2025-01-01", "REAL", "P1", 11.0, 20.0, 110.0, 5.0, 4.0, 1.0, 0.0, "Aman"],
+    ])
+    deleted = db._prepare_frame(pd.DataFrame(), db.SUMP_COLUMNS)
+
+    out = proc.apply_site_pit_delta(df_all, deleted, [("dummy_A", "P1")])
+
+    assert proc.site_pit_pairs(out) == [("REAL", "P1")]
+    assert pd.api.types.is_datetime64_any_dtype(out["Tanggal"])
+    assert out["Tanggal"].dt.year.tolist() == [2025]
+
+
+def test_delta_deleting_every_pair_keeps_dtypes():
+    df_all = _sump([["2025-01-01", "dummy_A", "P1", 10.0, 20.0, 100.0, 5.0, 4.0, 1.0, 0.0, "Aman"]])
+    untyped = pd.DataFrame(columns=list(db.SUMP_COLUMNS.values()))
+
+    out = proc.apply_site_pit_delta(df_all, untyped, [("dummy_A", "P1")])
+
+    assert out.empty
+    assert pd.api.types.is_datetime64_any_dtype(out["Tanggal"])
+    assert out["Elevasi Air (m)"].dtype == float
+
+
+def test_page_edit_deleting_every_row_keeps_dtypes():
+    df_all = _sump([["2025-01-01", "dummy_A", "P1", 10.0, 20.0, 100.0, 5.0, 4.0, 1.0, 0.0, "Aman"]])
+    edited = pd.DataFrame(columns=list(db.SUMP_COLUMNS.values()))
+
+    out = proc.apply_page_edit(df_all, df_all, edited, db.SUMP_KEY)
+
+    assert out.empty
+    assert pd.api.types.is_datetime64_any_dtype(out["Tanggal"])
+
+
+def test_page_edit_on_empty_page_types_new_rows():
+    df_all = _sump([["2025-01-01", "dummy_A", "P1", 10.0, 20.0, 100.0, 5.0, 4.0, 1.0, 0.0, "Aman"]])
+    page = db._prepare_frame(pd.DataFrame(), db.SUMP_COLUMNS)
+    edited = db.normalize_types(pd.DataFrame(
+        [["2025-01-02", "dummy_A", "P1", "11", None, None, None, None, None, None, "Aman"],
+         ["besok", "dummy_A", "P1", "x", None, None, None, None, None, None, "Aman"]],
+        columns=list(db.SUMP_COLUMNS.values())))
+
+    out = proc.apply_page_edit(df_all, page, edited, db.SUMP_KEY)
+
+    assert pd.api.types.is_datetime64_any_dtype(out["Tanggal"])
+    assert out["Tanggal"].isna().tolist() == [False, False, True]
+    assert out["Elevasi Air (m)"].tolist()[:2] == [10.0, 11.0]
+    assert out["Elevasi Air (m)"].dtype == float
@@ -1,5 +1,6 @@
 import streamlit as st
 import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 import os
 
 USERS = {"englcm": "eng123", "engwsl": "eng123", "engne": "eng123", "admin": "eng123"}
@@ -167,4 +168,91 @@ def render_charts(df_wb_dash, df_p_display, title_suffix):
             fig_e.update_layout(title="EWH (Jam)", legend=dict(orientation='h', y=1.1), height=300, margin=dict(t=30), **layout_settings)
             st.plotly_chart(fig_e, use_container_width=True)
     else:
-        st.info("Data Pompa tidak ditemukan untuk filter ini.")
\ No newline at end of file
+        st.info("Data Pompa tidak ditemukan untuk filter ini.")
+
+def render_fleet_ranking(df_fleet, period_label):
+    layout_settings = dict(
+        paper_bgcolor='rgba(0,0,0,0)', 
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(color="black")
+    )
+
+    st.subheader(f"🏆 Ranking Performa Pompa Semua Site ({period_label})")
+    if df_fleet.empty:
+        st.info("Data Pompa belum tersedia untuk periode ini.")
+        return
+
+    labels = df_fleet['Unit Code'] + " · " + df_fleet['Pit']
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=labels, y=df_fleet['Volume Achievement %'], name='Volume Ach.', marker_color='#2ecc71',
+        text=df_fleet['Volume Achievement %'], texttemplate='%{text:.0f}%', textposition='auto',
+        customdata=df_fleet['Site'], hovertemplate='%{x}<br>%{customdata}<br>%{y:.1f}%<extra></extra>'
+    ))
+    fig.add_trace(go.Scatter(x=labels, y=df_fleet['EWH Utilization %'], name='EWH Util.', mode='markers', marker=dict(color='#d35400', size=9)))
+    fig.add_hline(y=100, line=dict(color='#2c3e50', dash='dash'))
+    fig.update_layout(title="Achievement vs Plan (%)", legend=dict(orientation='h', y=1.1), height=350, margin=dict(t=30), **layout_settings)
+    st.plotly_chart(fig, use_container_width=True)
+
+    st.dataframe(
+        df_fleet.style.format({
+            'Debit Avg (m3/h)': '{:,.0f}',
+            'Debit Achievement %': '{:.1f}%',
+            'EWH Utilization %': '{:.1f}%',
+            'Volume Actual (m3)': '{:,.0f}',
+            'Volume Plan (m3)': '{:,.0f}',
+            'Volume Achievement %': '{:.1f}%'
+        }),
+        hide_index=True,
+        use_container_width=True
+    )
+
+def render_sump_grid(df_daily, df_pits, period_label, n_cols=4):
+    """Small multiples of every pit of a site: one figure with shared axes plus a sparkline table."""
+    layout_settings = dict(
+        paper_bgcolor='rgba(0,0,0,0)', 
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(color="black")
+    )
+
+    st.subheader(f"🗺️ Overview Semua Sump ({period_label})")
+    if df_pits.empty:
+        st.info("Data Sump belum tersedia untuk periode ini.")
+        return
+
+    # --- 1. ELEVATION GRID ---
+    n_rows = -(-len(df_pits) // n_cols)
+    titles = [
+        f"{r['Pit']}<br><sup>{r['Elevasi (m)']:.2f} / {r['Critical (m)']:.2f} m</sup>"
+        for _, r in df_pits.iterrows()
+    ]
+    fig = make_subplots(rows=n_rows, cols=n_cols, shared_xaxes='all', shared_yaxes='all',
+                        subplot_titles=titles, vertical_spacing=min(0.3 / n_rows, 0.08), horizontal_spacing=0.02)
+    for i, (pit, df_pit) in enumerate(df_daily.groupby('Pit', sort=True)):
+        row, col = i // n_cols + 1, i % n_cols + 1
+        danger = df_pits['Status'].iloc[i] == 'BAHAYA'
+        fig.add_trace(go.Scatter(x=df_pit['Tanggal'], y=df_pit['Elevasi Air (m)'], mode='lines', name=pit,
+                                 line=dict(color='#e74c3c' if danger else '#e67e22', width=2)), row=row, col=col)
+        fig.add_trace(go.Scatter(x=df_pit['Tanggal'], y=df_pit['Critical Elevation (m)'], mode='lines', name='Limit',
+                                 line=dict(color='red', dash='dash', width=1), hoverinfo='skip'), row=row, col=col)
+    fig.update_layout(showlegend=False, height=170 * n_rows + 40, margin=dict(t=40, b=10), **layout_settings)
+    fig.update_annotations(font_size=11)
+    st.plotly_chart(fig, use_container_width=True)
+
+    # --- 2. PIT TABLE WITH SPARKLINES ---
+    st.dataframe(
+        df_pits.drop(columns=['Tanggal']),
+        column_config={
+            'Elevasi (m)': st.column_config.NumberColumn(format="%.2f"),
+            'Critical (m)': st.column_config.NumberColumn(format="%.2f"),
+            'Margin (m)': st.column_config.NumberColumn(format="%.2f"),
+            'Rain MTD (mm)': st.column_config.NumberColumn(format="%.0f"),
+            'Pumped MTD (m3)': st.column_config.NumberColumn(format="%.0f"),
+            'Error % Terakhir': st.column_config.NumberColumn(format="%.1f%%"),
+            'Elevasi Trend': st.column_config.LineChartColumn(),
+            'Pumped Trend': st.column_config.BarChartColumn(),
+            'Error % Trend': st.column_config.LineChartColumn(y_min=0),
+        },
+        hide_index=True,
+        use_container_width=True
+    )